@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ServiceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "Book"
+
+    def ready(self):
+        from Book import signals  # noqa: F401
@@ -0,0 +1,86 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from Library.cache import get_or_build, incr_counter
+from Library.metrics import CACHE_LOOKUPS
+from Library.routers import primary_reads
+
+CATALOG_VERSION_KEY = "book:catalog:version"
+CATALOG_HITS_KEY = "book:catalog:hits"
+CATALOG_MISSES_KEY = "book:catalog:misses"
+
+
+def _initial_version():
+    # Time based, so a version evicted from the cache never reuses old keys.
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 0)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        version = _initial_version()
+        cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+        return version
+
+
+def catalog_cache_key(request):
+    uri = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    return f"book:catalog:{get_catalog_version()}:{uri}"
+
+
+def get_cached_catalog_data(request, build):
+    def build_from_primary():
+        # Cached under the new version until the next bump, so it must not
+        # come from a replica that has not seen the change yet.
+        with primary_reads():
+            return build()
+
+    data, hit = get_or_build(
+        catalog_cache_key(request),
+        build_from_primary,
+        timeout=settings.BOOK_CACHE_TIMEOUT,
+    )
+    incr_counter(CATALOG_HITS_KEY if hit else CATALOG_MISSES_KEY)
+    CACHE_LOOKUPS.labels("catalog", "hit" if hit else "miss").inc()
+    return data
+
+
+def get_catalog_cache_stats():
+    return {
+        "version": get_catalog_version(),
+        "hits": cache.get(CATALOG_HITS_KEY, 0),
+        "misses": cache.get(CATALOG_MISSES_KEY, 0),
+    }
+
+
+class CatalogCacheMixin:
+    """Serve list and retrieve responses from the versioned catalog cache."""
+
+    def list(self, request, *args, **kwargs):
+        data = get_cached_catalog_data(
+            request,
+            lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs).data,
+        )
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = get_cached_catalog_data(
+            request,
+            lambda: super(CatalogCacheMixin, self)
+            .retrieve(request, *args, **kwargs)
+            .data,
+        )
+        return Response(data)
@@ -0,0 +1,140 @@
+import codecs
+import csv
+import json
+import os
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from Book.cache import bump_catalog_version
+from Book.models import Book
+from Book.serializers import BookSerializer
+
+FORMATS = ("csv", "jsonl")
+ENCODING = "utf-8-sig"
+UPDATE_FIELDS = ["cover", "inventory", "daily_fee", "updated_at"]
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension == "ndjson":
+        return "jsonl"
+    return extension if extension in FORMATS else None
+
+
+def check_encoding(file, block_size=64 * 1024):
+    """
+    Raise ``UnicodeDecodeError`` unless the binary ``file`` is UTF-8, then
+    rewind it; checked up front so a bad byte cannot stop an import halfway.
+    """
+    decoder = codecs.getincrementaldecoder(ENCODING)()
+    while block := file.read(block_size):
+        decoder.decode(block)
+    decoder.decode(b"", final=True)
+    file.seek(0)
+
+
+def read_rows(stream, file_format):
+    """Yield ``(row_number, data, error)`` one row at a time."""
+    if file_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, row, None
+        return
+
+    row_number = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as error:
+            yield row_number, None, {"non_field_errors": [f"Invalid JSON: {error}"]}
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, {"non_field_errors": ["Expected a JSON object."]}
+            continue
+        yield row_number, data, None
+
+
+def import_books(stream, file_format, chunk_size=1000):
+    """
+    Upsert books from a CSV or JSON Lines text stream.
+
+    Rows are read and validated in chunks of ``chunk_size`` so memory stays
+    bounded. Each chunk costs one lookup query plus one ``bulk_create`` and one
+    ``bulk_update``; rows are matched on ``(title, author)``. A row repeating
+    the key of an earlier row in its chunk is reported as failed; in a later
+    chunk it updates the book again.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format {file_format!r}, use one of {FORMATS}.")
+
+    result = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+    rows = read_rows(stream, file_format)
+
+    while chunk := list(islice(rows, chunk_size)):
+        valid, row_numbers = {}, {}
+        for row_number, data, error in chunk:
+            if error is None:
+                serializer = BookSerializer(data=data)
+                if not serializer.is_valid():
+                    error = serializer.errors
+                else:
+                    book = serializer.validated_data
+                    key = (book["title"], book["author"])
+                    if key not in valid:
+                        valid[key] = book
+                        row_numbers[key] = row_number
+                        continue
+                    error = {
+                        "non_field_errors": [
+                            f"Duplicate of row {row_numbers[key]} (same title "
+                            "and author)."
+                        ]
+                    }
+
+            result["failed"] += 1
+            if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                result["errors"].append({"row": row_number, "errors": error})
+
+        created, updated = _upsert_chunk(valid)
+        result["created"] += created
+        result["updated"] += updated
+
+    if result["created"] or result["updated"]:
+        # Bulk writes bypass the Book signals.
+        transaction.on_commit(bump_catalog_version)
+
+    return result
+
+
+def _upsert_chunk(rows):
+    if not rows:
+        return 0, 0
+
+    with transaction.atomic():
+        existing = {}
+        titles = {title for title, _ in rows}
+        for book in Book.objects.filter(title__in=titles).order_by("id"):
+            existing.setdefault((book.title, book.author), book)
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for key, data in rows.items():
+            book = existing.get(key)
+            if book is None:
+                to_create.append(Book(**data))
+                continue
+            for field, value in data.items():
+                setattr(book, field, value)
+            book.updated_at = now
+            to_update.append(book)
+
+        Book.objects.bulk_create(to_create)
+        Book.objects.bulk_update(to_update, UPDATE_FIELDS)
+
+    return len(to_create), len(to_update)
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from Book.cache import bump_catalog_version
+from Book.models import Book
+
+
+def reserve_copy(book_id):
+    """
+    Take one copy of the book off the shelf.
+
+    A single conditional UPDATE, so concurrent borrowers can never drive the
+    inventory below zero. Returns False when no copy is left.
+    """
+    reserved = Book.objects.filter(pk=book_id, inventory__gt=0).update(
+        inventory=F("inventory") - 1, updated_at=timezone.now()
+    )
+    if reserved:
+        transaction.on_commit(bump_catalog_version)
+    return bool(reserved)
+
+
+def release_copy(book_id):
+    """Put one copy of the book back on the shelf."""
+    Book.objects.filter(pk=book_id).update(
+        inventory=F("inventory") + 1, updated_at=timezone.now()
+    )
+    transaction.on_commit(bump_catalog_version)
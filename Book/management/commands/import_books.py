@@ -0,0 +1,51 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Book.importers import (
+    ENCODING,
+    FORMATS,
+    check_encoding,
+    detect_format,
+    import_books,
+)
+
+
+class Command(BaseCommand):
+    help = "Import or update books from a CSV or JSON Lines file, matching on title and author."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .csv or .jsonl file.")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=FORMATS,
+            help="File format. Detected from the file extension by default.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        file_format = options["file_format"] or detect_format(options["path"])
+        if file_format is None:
+            raise CommandError("Cannot detect the file format, pass --format.")
+
+        try:
+            with open(options["path"], "rb") as file:
+                check_encoding(file)
+                stream = io.TextIOWrapper(file, encoding=ENCODING, newline="")
+                result = import_books(stream, file_format, options["chunk_size"])
+        except OSError as error:
+            raise CommandError(error)
+        except UnicodeDecodeError:
+            raise CommandError("The file is not UTF-8 encoded text.")
+
+        for error in result["errors"]:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {result['created']}, updated {result['updated']}, "
+                f"failed {result['failed']} book(s)."
+            )
+        )
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:06
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+CREATE_SEARCH_TRIGGER = """
+CREATE OR REPLACE FUNCTION book_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.author, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER book_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author ON "Book_book"
+    FOR EACH ROW EXECUTE FUNCTION book_search_vector_update();
+
+UPDATE "Book_book" SET title = title;
+
+CREATE INDEX book_search_vector_gin ON "Book_book" USING gin (search_vector);
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP INDEX IF EXISTS book_search_vector_gin;
+DROP TRIGGER IF EXISTS book_search_vector_trigger ON "Book_book";
+DROP FUNCTION IF EXISTS book_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_SEARCH_TRIGGER)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Book", "0002_alter_book_cover_alter_book_inventory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
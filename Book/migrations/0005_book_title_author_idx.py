@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Book", "0004_book_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["title", "author"], name="book_title_author_idx"
+            ),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -15,6 +16,15 @@ class Book(models.Model):
     inventory = models.PositiveIntegerField()
 
     daily_fee = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Maintained by a database trigger on PostgreSQL, see migration 0003.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["title", "author"], name="book_title_author_idx"),
+        ]
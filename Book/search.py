@@ -0,0 +1,28 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+
+def search_books(queryset, text):
+    """
+    Filter the catalog by ``text`` and annotate every match with ``rank``.
+
+    PostgreSQL uses the GIN-indexed ``search_vector`` column. Other backends
+    (SQLite in dev) fall back to a substring match that ranks title hits
+    above author hits.
+    """
+    if connections[queryset.db].vendor == "postgresql":
+        query = SearchQuery(text, config="english", search_type="websearch")
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F("search_vector"), query)
+        )
+
+    return queryset.filter(
+        Q(title__icontains=text) | Q(author__icontains=text)
+    ).annotate(
+        rank=Case(
+            When(title__icontains=text, then=Value(1.0)),
+            default=Value(0.5),
+            output_field=FloatField(),
+        )
+    )
@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Book.cache import bump_catalog_version
+from Book.models import Book
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_catalog_cache(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
@@ -1,3 +1,282 @@
+import io
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from Book.cache import get_catalog_cache_stats
+from Book.importers import import_books
+from Book.models import Book
+from Library.cache import get_or_build
+
+
+class BookSearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("book-list")
+
+        self.dune = Book.objects.create(
+            title="Dune", author="Frank Herbert", inventory=1, daily_fee=1
+        )
+        self.messiah = Book.objects.create(
+            title="Dune Messiah", author="Frank Herbert", inventory=1, daily_fee=1
+        )
+        self.about_dune = Book.objects.create(
+            title="Sandworms", author="Dune Fan", inventory=1, daily_fee=1
+        )
+        Book.objects.create(
+            title="Solaris", author="Stanislaw Lem", inventory=1, daily_fee=1
+        )
+
+    def test_search_filters_by_title_and_author(self):
+        response = self.client.get(self.url, {"search": "herbert"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [book["title"] for book in response.data["results"]]
+        self.assertEqual(titles, ["Dune", "Dune Messiah"])
+
+    def test_search_ranks_title_matches_first(self):
+        response = self.client.get(self.url, {"search": "dune"})
+
+        ids = [book["id"] for book in response.data["results"]]
+        self.assertEqual(ids, [self.dune.id, self.messiah.id, self.about_dune.id])
+
+    def test_search_results_are_paginated(self):
+        response = self.client.get(self.url, {"search": "dune", "page_size": 2})
+        first_page = [book["id"] for book in response.data["results"]]
+
+        response = self.client.get(response.data["next"])
+        second_page = [book["id"] for book in response.data["results"]]
+
+        self.assertEqual(
+            first_page + second_page,
+            [self.dune.id, self.messiah.id, self.about_dune.id],
+        )
+
+    def test_search_pages_through_equal_ranks(self):
+        # More equally ranked matches than DRF's offset_cutoff (1000).
+        Book.objects.bulk_create(
+            Book(title=f"Dune {index}", inventory=1, daily_fee=1)
+            for index in range(1100)
+        )
+
+        ids = []
+        response = self.client.get(self.url, {"search": "dune", "page_size": 500})
+        while True:
+            ids += [book["id"] for book in response.data["results"]]
+            if not response.data["next"]:
+                break
+            self.assertLess(len(ids), 1103)
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 1103)
+
+    def test_list_without_search_returns_whole_catalog(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data["results"]), 4)
+
+
+class BookCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("book-list")
+        self.book = Book.objects.create(
+            title="Dune", author="Frank Herbert", inventory=2, daily_fee=1
+        )
+
+    def test_second_read_is_served_from_cache(self):
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.data["results"][0]["title"], "Dune")
+        self.assertEqual(get_catalog_cache_stats()["hits"], 1)
+        self.assertEqual(get_catalog_cache_stats()["misses"], 1)
+
+    def test_detail_is_cached(self):
+        url = reverse("book-detail", args=[self.book.id])
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEqual(response.data["id"], self.book.id)
+
+    def test_saving_a_book_invalidates_cache(self):
+        self.client.get(self.url)
+        version = get_catalog_cache_stats()["version"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.inventory = 1
+            self.book.save()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(get_catalog_cache_stats()["version"], version + 1)
+        self.assertEqual(response.data["results"][0]["inventory"], 1)
+
+    def test_deleting_a_book_invalidates_cache(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.delete()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data["results"], [])
+
+    def test_unchanged_catalog_returns_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_concurrent_misses_rebuild_once(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return "catalog"
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(get_or_build("coalesce", build, 60))
+            )
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual([value for value, _ in results], ["catalog"] * 10)
+
+
+class BookImportTestCase(TestCase):
+    CSV = (
+        "title,author,cover,inventory,daily_fee\n"
+        "Dune,Frank Herbert,HARD,3,1.50\n"
+        "Solaris,Stanislaw Lem,SOFT,2,1.00\n"
+        ",Nobody,SOFT,1,1.00\n"
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("book-bulk-import")
+        self.client = APIClient()
+
+    def test_import_creates_books_and_reports_bad_rows(self):
+        result = import_books(io.StringIO(self.CSV), "csv", chunk_size=2)
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(result["failed"], 1)
+        self.assertEqual(result["errors"][0]["row"], 3)
+        self.assertIn("title", result["errors"][0]["errors"])
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_import_upserts_on_title_and_author(self):
+        Book.objects.create(
+            title="Dune", author="Frank Herbert", inventory=1, daily_fee=1
+        )
+        rows = (
+            '{"title": "Dune", "author": "Frank Herbert", "inventory": 7, "daily_fee": "2.00"}\n'
+            '{"title": "Dune", "author": "Brian Herbert", "inventory": 1, "daily_fee": "1.00"}\n'
+            "not json\n"
+        )
+
+        result = import_books(io.StringIO(rows), "jsonl")
+
+        self.assertEqual((result["created"], result["updated"]), (1, 1))
+        self.assertEqual(result["failed"], 1)
+        book = Book.objects.get(title="Dune", author="Frank Herbert")
+        self.assertEqual(book.inventory, 7)
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_import_reports_repeated_rows(self):
+        rows = self.CSV + "Dune,Frank Herbert,SOFT,9,2.00\n"
+
+        result = import_books(io.StringIO(rows), "csv")
+
+        self.assertEqual((result["created"], result["failed"]), (2, 2))
+        self.assertEqual(result["errors"][1]["row"], 4)
+        self.assertIn("Duplicate of row 1", str(result["errors"][1]["errors"]))
+        self.assertEqual(Book.objects.get(title="Dune").inventory, 3)
+
+    def test_bulk_endpoint_rejects_non_utf8_files(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser(
+                email="admin@test.com", password="pass"
+            )
+        )
+        upload = SimpleUploadedFile(
+            "books.csv", self.CSV.encode() + "Über,Ünter,HARD,1,1\n".encode("latin-1")
+        )
+
+        response = self.client.post(self.url, {"file": upload})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file", response.data)
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_import_command(self):
+        path = self._write_tmp("books.csv", self.CSV)
+        out = io.StringIO()
+
+        call_command("import_books", path, stdout=out, stderr=io.StringIO())
+
+        self.assertIn("Created 2, updated 0, failed 1", out.getvalue())
+
+    def test_bulk_endpoint_is_admin_only(self):
+        user = get_user_model().objects.create_user(
+            email="user@test.com", password="pass"
+        )
+        self.client.force_authenticate(user)
+
+        response = self.client.post(self.url, {"file": self._upload()})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_endpoint_imports_file(self):
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="pass"
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.post(self.url, {"file": self._upload()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["failed"], 1)
+
+    def _upload(self):
+        return SimpleUploadedFile("books.csv", self.CSV.encode(), "text/csv")
 
-# Create your tests here.
+    def _write_tmp(self, name, content):
+        directory = tempfile.mkdtemp()
+        path = f"{directory}/{name}"
+        with open(path, "w") as file:
+            file.write(content)
+        return path
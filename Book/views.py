@@ -1,11 +1,123 @@
-from rest_framework import viewsets
+import io
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
 from Book import permissions
+from Book.cache import CatalogCacheMixin, get_catalog_version
+from Book.importers import (
+    ENCODING,
+    FORMATS,
+    check_encoding,
+    detect_format,
+    import_books,
+)
 from Book.models import Book
+from Book.search import search_books
 from Book.serializers import BookSerializer
+from Library.conditional import ConditionalGetMixin
+from Library.pagination import BookCursorPagination
+from Library.query_budget import QueryBudgetMixin
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(
+    QueryBudgetMixin, ConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet
+):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = (permissions.IsAdminOrReadOnly,)
+    pagination_class = BookCursorPagination
+    # bulk_import scales with the file size, so it has no budget.
+    query_budget = {
+        "list": 2,
+        "retrieve": 2,
+        "create": 2,
+        "update": 3,
+        "partial_update": 3,
+        "destroy": 3,
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        search = self.request.query_params.get("search", "").strip()
+        if search and self.action == "list":
+            queryset = search_books(queryset, search)
+
+        return queryset
+
+    def get_conditional_state(self):
+        # Any catalog change bumps the version, so no query is needed.
+        return (get_catalog_version(),), None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="search",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description="Full-text search over title and author, best matches first.",
+            ),
+        ],
+        responses={200: BookSerializer(many=True)},
+        description="Take books list. Can search by title and author.",
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "file_format": {"type": "string", "enum": [*FORMATS]},
+                },
+            }
+        },
+        responses={
+            200: OpenApiResponse(description="Import summary with per-row errors"),
+            400: OpenApiResponse(description="Missing file or unknown format"),
+        },
+        description="(Only admins) Upsert books from a CSV or JSON Lines file, matching on title and author.",
+    )
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="bulk",
+        permission_classes=[IsAdminUser],
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_import(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["This field is required."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        file_format = request.data.get("file_format") or detect_format(upload.name)
+        if file_format not in FORMATS:
+            return Response(
+                {"file_format": [f"Use one of: {', '.join(FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            check_encoding(upload.file)
+        except UnicodeDecodeError:
+            return Response(
+                {"file": ["The file is not UTF-8 encoded text."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding=ENCODING, newline="")
+        result = import_books(stream, file_format)
+
+        return Response(result, status=status.HTTP_200_OK)
@@ -0,0 +1,8 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class BookNotAvailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Book is not available."
+    default_code = "book_not_available"
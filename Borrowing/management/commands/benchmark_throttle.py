@@ -0,0 +1,58 @@
+import statistics
+import time
+
+import redis
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from Library.throttling import IPTokenBucketThrottle, get_bucket
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of the token bucket throttle with the "
+        "local and the Redis backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=10000)
+        parser.add_argument(
+            "--backend", choices=["local", "redis"], action="append", default=None
+        )
+
+    def handle(self, *args, **options):
+        requests = options["requests"]
+        view = APIView()
+        view.throttle_scope = "benchmark"
+        request = Request(APIRequestFactory().get("/"))
+
+        for backend in options["backend"] or ["local", "redis"]:
+            # Never run out of tokens, so every request does the full check.
+            with override_settings(
+                THROTTLE_BACKEND=backend,
+                THROTTLE_RATES={"benchmark": f"{requests * 10}/s"},
+            ):
+                if backend == "redis":
+                    try:
+                        get_bucket().client.ping()
+                    except redis.RedisError as error:
+                        self.stderr.write(f"redis: skipped, {error}")
+                        continue
+
+                throttle = IPTokenBucketThrottle()
+                timings = []
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    allowed = throttle.allow_request(request, view)
+                    timings.append((time.perf_counter() - started) * 1e6)
+                    assert allowed
+
+            timings.sort()
+            self.stdout.write(
+                f"{backend}: median {statistics.median(timings):.1f} us, "
+                f"p99 {timings[int(len(timings) * 0.99) - 1]:.1f} us per check "
+                f"over {requests} requests"
+            )
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Book", "0002_alter_book_cover_alter_book_inventory"),
+        ("Borrowing", "0002_alter_borrowing_user"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                fields=["borrow_date", "id"], name="borrowing_date_id_idx"
+            ),
+        ),
+    ]
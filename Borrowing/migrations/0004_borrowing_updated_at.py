@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Borrowing", "0003_borrowing_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="borrowing",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
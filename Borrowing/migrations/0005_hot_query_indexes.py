@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Book", "0005_book_title_author_idx"),
+        ("Borrowing", "0004_borrowing_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                condition=models.Q(("actual_return_date__isnull", True)),
+                fields=["user", "book"],
+                name="borrowing_active_user_book_idx",
+            ),
+        ),
+    ]
@@ -13,6 +13,27 @@ class Borrowing(models.Model):
     borrow_date = models.DateField(auto_now_add=True)
     expected_return_date = models.DateField()
     actual_return_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.email} → {self.book.title}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["borrow_date", "id"], name="borrowing_date_id_idx"),
+            models.Index(
+                fields=["user", "book"],
+                condition=models.Q(actual_return_date__isnull=True),
+                name="borrowing_active_user_book_idx",
+            ),
+        ]
+
+
+class TelegramMessage(models.Model):
+    """A notification waiting in the outbox until its digest part is sent."""
+
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.text[:50]
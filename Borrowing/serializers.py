@@ -2,16 +2,20 @@ from datetime import date, timedelta
 
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 
+from Book.inventory import release_copy, reserve_copy
+from Borrowing.exceptions import BookNotAvailable
 from Borrowing.models import Borrowing
+from Library.timing import TimedSerializerMixin
 from Payment.models import Payment
 from Payment.serializers import PaymentSerializer
-from Payment.services import create_stripe_session
+from Payment.services import schedule_stripe_session
 
 
-class BorrowingSerializer(serializers.ModelSerializer):
+class BorrowingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Borrowing
@@ -46,11 +50,6 @@ class BorrowingSerializer(serializers.ModelSerializer):
                 {"non_field_errors": ["Unpaid payments detected."]}
             )
 
-        book = data["book"]
-
-        if book.inventory <= 0:
-            raise serializers.ValidationError({"book": "Book is not available."})
-
         if "expected_return_date" not in data:
             data["expected_return_date"] = date.today() + timedelta(days=60)
 
@@ -59,38 +58,31 @@ class BorrowingSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         request = self.context.get("request")
         book = validated_data["book"]
-        borrowing = super().create(validated_data)
 
         with transaction.atomic():
+            if not reserve_copy(book.id):
+                raise BookNotAvailable()
 
-            book.inventory -= 1
-            book.save()
+            borrowing = super().create(validated_data)
 
             money_to_pay = (
                 validated_data["expected_return_date"] - borrowing.borrow_date
             ).days * borrowing.book.daily_fee
 
-            session_url, session_id = create_stripe_session(
-                borrowing,
-                request=request,
-                amount=money_to_pay,
-                description=f"Payment for: {book.title}",
-                payment_type="PAYMENT",
-            )
-
-            Payment.objects.create(
+            payment = Payment.objects.create(
                 borrowing=borrowing,
                 status="PENDING",
                 type="PAYMENT",
-                session_url=session_url,
-                session_id=session_id,
                 money_to_pay=money_to_pay,
             )
+            schedule_stripe_session(
+                payment, request=request, description=f"Payment for: {book.title}"
+            )
 
         return borrowing
 
 
-class BorrowingDetailSerializer(serializers.ModelSerializer):
+class BorrowingDetailSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = SlugRelatedField(
         slug_field="email",
         read_only=True,
@@ -114,10 +106,12 @@ class BorrowingDetailSerializer(serializers.ModelSerializer):
         ]
 
 
-class ReturnBorrowingSerializer(serializers.ModelSerializer):
+class ReturnBorrowingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    payments = PaymentSerializer(many=True, read_only=True)
+
     class Meta:
         model = Borrowing
-        fields = ["expected_return_date"]
+        fields = ["expected_return_date", "payments"]
         read_only_fields = ["expected_return_date"]
 
     def validate(self, attrs):
@@ -130,11 +124,18 @@ class ReturnBorrowingSerializer(serializers.ModelSerializer):
         today = date.today()
 
         with transaction.atomic():
+            # Conditional update, so a concurrent double return cannot put
+            # the copy back twice.
+            returned = Borrowing.objects.filter(
+                pk=instance.pk, actual_return_date__isnull=True
+            ).update(actual_return_date=today, updated_at=timezone.now())
+            if not returned:
+                raise serializers.ValidationError(
+                    {"non_field_errors": ["This book is already returned."]}
+                )
 
             instance.actual_return_date = today
-            instance.book.inventory += 1
-            instance.book.save()
-            instance.save()
+            release_copy(instance.book_id)
 
             if today > instance.expected_return_date:
                 payment = instance.payments.filter(type="PAYMENT", status="PAID").first()
@@ -147,19 +148,19 @@ class ReturnBorrowingSerializer(serializers.ModelSerializer):
                         overdue_days * instance.book.daily_fee * settings.FINE_MULTIPLIER
                     )
 
-                    session_url, session_id = create_stripe_session(
-                        instance,
-                        request=self.context["request"],
-                        amount=fine_amount,
-                        description=f"Fine for '{instance.book.title}' - {overdue_days} days overdue",
-                        payment_type="FINE",
-                    )
-
                     payment.type = "FINE"
                     payment.status = "PENDING"
                     payment.money_to_pay = fine_amount
-                    payment.session_url = session_url
-                    payment.session_id = session_id
+                    payment.session_url = ""
+                    payment.session_id = None
+                    # A new charge: its expiry counts from now.
+                    payment.created_at = timezone.now()
                     payment.save()
 
+                    schedule_stripe_session(
+                        payment,
+                        request=self.context["request"],
+                        description=f"Fine for '{instance.book.title}' - {overdue_days} days overdue",
+                    )
+
         return instance
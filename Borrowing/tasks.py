@@ -0,0 +1,13 @@
+import requests
+from celery import shared_task
+
+from Borrowing.telegram_send import flush_outbox
+
+
+@shared_task(
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=True,
+    max_retries=5,
+)
+def flush_telegram_outbox():
+    return f"Delivered {flush_outbox()} message(s)"
@@ -1,19 +1,175 @@
-import os
+import logging
+import time
 
-import dotenv
 import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from Borrowing.models import TelegramMessage
+from Library.cache import incr_counter
+from Library.metrics import observe_external_call
+from Library.timing import track
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_SCHEDULED_KEY = "telegram:outbox:scheduled"
+# Messages read from the outbox per digest part.
+OUTBOX_BATCH_SIZE = 100
+
+# Telegram rejects longer messages.
+MAX_MESSAGE_LENGTH = 4096
+
+
+class HttpTransport:
+    """Talks to the Telegram Bot API over one pooled keep-alive session."""
+
+    def __init__(self):
+        retry = Retry(
+            total=settings.TELEGRAM_MAX_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=["POST"],
+            respect_retry_after_header=True,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(max_retries=retry))
+
+    def send(self, chat_id, text):
+        url = f"https://api.telegram.org/bot{settings.TELEGRAM_TOKEN}/sendMessage"
+        started = time.perf_counter()
+        try:
+            with track("telegram"):
+                response = self.session.post(
+                    url,
+                    data={"chat_id": chat_id, "text": text},
+                    timeout=settings.TELEGRAM_TIMEOUT,
+                )
+            response.raise_for_status()
+        except requests.RequestException as error:
+            observe_external_call(
+                "telegram", "sendMessage", time.perf_counter() - started, error
+            )
+            raise
+        observe_external_call("telegram", "sendMessage", time.perf_counter() - started)
+
+
+class LocalTransport:
+    """Keeps messages in memory instead of sending them. For tests and dev."""
+
+    outbox = []
+
+    def send(self, chat_id, text):
+        self.outbox.append((chat_id, text))
+
+
+_transports = {}
+
+
+def get_transport():
+    path = settings.TELEGRAM_TRANSPORT
+    if path not in _transports:
+        _transports[path] = import_string(path)()
+    return _transports[path]
 
-dotenv.load_dotenv()
 
 def send_telegram_message(text):
-    token = os.getenv("TELEGRAM_TOKEN")
-    chat_id = os.getenv("TELEGRAM_CHAT_ID")
-
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {"chat_id": chat_id, "text": text}
-    try:
-        response = requests.post(url, data=payload)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"❌ Не удалось отправить сообщение в Telegram: {e}")
+    """
+    Queue ``text`` for the admin chat.
+
+    The message is written to the outbox table in the current transaction,
+    so it is delivered only if that transaction commits, and the flush is
+    scheduled once it has.
+    """
+    TelegramMessage.objects.create(text=text)
+    transaction.on_commit(schedule_flush)
+
+
+def schedule_flush():
+    """
+    Make sure a flush is scheduled.
+
+    Everything queued within ``TELEGRAM_DIGEST_WINDOW`` seconds is delivered
+    as a single digest message.
+    """
+    window = settings.TELEGRAM_DIGEST_WINDOW
+    if cache.add(OUTBOX_SCHEDULED_KEY, 1, timeout=window * 2 + 60):
+        from Borrowing.tasks import flush_telegram_outbox
+
+        try:
+            flush_telegram_outbox.apply_async(countdown=window)
+        except Exception:
+            # The message stays in the outbox for the next scheduled flush.
+            logger.exception("Could not schedule the Telegram outbox flush")
+
+
+def flush_outbox():
+    """
+    Deliver the outbox as digests, oldest messages first.
+
+    Every part is sent in its own transaction that deletes the messages it
+    holds, so after a failure only the parts not yet sent are delivered
+    again. Concurrent flushes skip each other's locked rows. Returns the
+    number of messages delivered.
+    """
+    # Messages queued from now on schedule a new flush.
+    cache.delete(OUTBOX_SCHEDULED_KEY)
+
+    delivered = 0
+    while True:
+        with transaction.atomic():
+            messages = list(
+                TelegramMessage.objects.select_for_update(skip_locked=True)
+                .order_by("pk")
+                .only("text")[:OUTBOX_BATCH_SIZE]
+            )
+            if not messages:
+                return delivered
+
+            part, count = next(_digest_parts(message.text for message in messages))
+            wait_for_send_slot(settings.TELEGRAM_CHAT_ID)
+            get_transport().send(settings.TELEGRAM_CHAT_ID, part)
+
+            TelegramMessage.objects.filter(
+                pk__in=[message.pk for message in messages[:count]]
+            ).delete()
+        delivered += count
+
+
+def build_digest(texts):
+    """Join messages into as few parts as Telegram's length limit allows."""
+    return [part for part, _ in _digest_parts(texts)]
+
+
+def _digest_parts(texts):
+    # Yields (part, number of messages in it).
+    current, count = "", 0
+    for text in texts:
+        text = text[:MAX_MESSAGE_LENGTH]
+        candidate = f"{current}\n\n{text}" if current else text
+        if len(candidate) > MAX_MESSAGE_LENGTH:
+            yield current, count
+            candidate, count = text, 0
+        current, count = candidate, count + 1
+    if current:
+        yield current, count
+
+
+def wait_for_send_slot(chat_id):
+    """
+    Block until ``chat_id`` may receive another message.
+
+    Telegram allows about one message per second to a chat and 20 per minute
+    to a group, so both limits are enforced across all workers.
+    """
+    minute_key = f"telegram:rate:{chat_id}:{int(time.time() // 60)}"
+    while incr_counter(minute_key) > settings.TELEGRAM_MESSAGES_PER_MINUTE:
+        time.sleep(60 - time.time() % 60)
+        minute_key = f"telegram:rate:{chat_id}:{int(time.time() // 60)}"
+    cache.touch(minute_key, 120)
+
+    while not cache.add(f"telegram:rate:{chat_id}", 1, timeout=1):
+        time.sleep(0.1)
@@ -1,19 +1,25 @@
 from datetime import timedelta, date
+from unittest.mock import patch
+
+import stripe
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
 
 from Book.models import Book
 from Borrowing.models import Borrowing
+from Library.throttling import get_bucket
 from Payment.models import Payment
 
 
 class BorrowingTestCase(TestCase):
     def setUp(self):
+        get_bucket().reset()
         self.user = get_user_model().objects.create_user(
             email="test@example.com", password="pass"
         )
@@ -21,12 +27,21 @@ class BorrowingTestCase(TestCase):
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
 
-    def test_create_borrowing_creates_payment(self):
+    @patch("Payment.services.schedule_payment_expiry")
+    @patch(
+        "Payment.services.create_stripe_session",
+        return_value=("https://checkout.stripe.com/c/pay/cs_test", "cs_test"),
+    )
+    def test_create_borrowing_creates_payment(self, mock_session, mock_expiry):
         expected_return = date.today() + timedelta(days=7)
-        response = self.client.post(
-            reverse("Borrowing:borrowing-list"),
-            {"book": self.book.id, "expected_return_date": expected_return.isoformat()},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("Borrowing:borrowing-list"),
+                {
+                    "book": self.book.id,
+                    "expected_return_date": expected_return.isoformat(),
+                },
+            )
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Borrowing.objects.count(), 1)
@@ -43,6 +58,70 @@ class BorrowingTestCase(TestCase):
         self.assertEqual(payment.type, "PAYMENT")
         self.assertGreater(len(payment.session_url), 10)
 
+    @patch(
+        "Payment.services.create_stripe_session",
+        side_effect=stripe.error.APIConnectionError("Stripe is down"),
+    )
+    @patch("Payment.tasks.create_payment_session.delay")
+    def test_borrowing_survives_stripe_outage(self, mock_delay, mock_session):
+        expected_return = date.today() + timedelta(days=7)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("Borrowing:borrowing-list"),
+                {
+                    "book": self.book.id,
+                    "expected_return_date": expected_return.isoformat(),
+                },
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        payment = Payment.objects.get()
+        self.assertIsNone(payment.session_id)
+        self.assertEqual(response.data["payments"][0]["session_url"], "")
+        mock_delay.assert_called_once()
+        self.assertEqual(mock_delay.call_args.args[0], payment.id)
+
+
+class BorrowingCheckoutSessionTestCase(TransactionTestCase):
+    def setUp(self):
+        get_bucket().reset()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="pass"
+        )
+        self.book = Book.objects.create(title="Test Book", inventory=5, daily_fee=10)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_session_is_created_after_commit_and_returned(self):
+        def create_session(*args, **kwargs):
+            self.assertFalse(connection.in_atomic_block)
+            self.assertEqual(Payment.objects.get().session_id, None)
+            return "https://checkout.stripe.com/c/pay/cs_test", "cs_test"
+
+        with patch(
+            "Payment.services.create_stripe_session", side_effect=create_session
+        ) as mock_session, patch(
+            "Payment.services.schedule_payment_expiry"
+        ) as mock_expiry:
+            response = self.client.post(
+                reverse("Borrowing:borrowing-list"),
+                {
+                    "book": self.book.id,
+                    "expected_return_date": date.today() + timedelta(days=7),
+                },
+            )
+
+        mock_session.assert_called_once()
+        self.assertIsNotNone(mock_session.call_args.kwargs["expires_at"])
+        mock_expiry.assert_called_once_with(
+            "cs_test", mock_session.call_args.kwargs["expires_at"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data["payments"][0]["session_url"],
+            "https://checkout.stripe.com/c/pay/cs_test",
+        )
+
 
 def test_return_borrowing_with_fine_creates_payment(self):
     borrow_date = date.today() - timedelta(days=10)
@@ -117,8 +196,8 @@ def test_borrowing_not_allowed_when_inventory_zero(self):
         {"book": self.book.id, "expected_return_date": expected_return.isoformat()},
     )
 
-    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-    self.assertIn("not available", response.data["non_field_errors"][0].lower())
+    self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+    self.assertIn("not available", response.data["detail"].lower())
 
 
 def test_expected_return_date_cannot_be_in_past(self):
@@ -0,0 +1,72 @@
+import threading
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Library.throttling import get_bucket
+
+User = get_user_model()
+
+
+def fake_stripe_session(borrowing, **kwargs):
+    session_id = f"cs_concurrent_{borrowing.id}"
+    return f"https://checkout.stripe.com/c/pay/{session_id}", session_id
+
+
+@patch("Payment.services.schedule_payment_expiry")
+@patch("Payment.services.create_stripe_session", side_effect=fake_stripe_session)
+class BorrowingConcurrencyTestCase(TransactionTestCase):
+    BORROWERS = 12
+    COPIES = 3
+
+    def setUp(self):
+        get_bucket().reset()
+        self.book = Book.objects.create(
+            title="Popular", author="Author", inventory=self.COPIES, daily_fee=1
+        )
+        self.users = [
+            User.objects.create_user(email=f"user{index}@test.com")
+            for index in range(self.BORROWERS)
+        ]
+
+    def test_last_copies_are_never_oversold(self, mock_session, mock_expiry):
+        statuses = []
+        barrier = threading.Barrier(self.BORROWERS)
+
+        def borrow(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                response = client.post(
+                    reverse("Borrowing:borrowing-list"),
+                    {
+                        "book": self.book.id,
+                        "expected_return_date": date.today() + timedelta(days=7),
+                    },
+                )
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=borrow, args=(user,)) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 0)
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), self.COPIES)
+        self.assertEqual(
+            statuses.count(status.HTTP_409_CONFLICT), self.BORROWERS - self.COPIES
+        )
+        self.assertEqual(Borrowing.objects.count(), self.COPIES)
@@ -6,6 +6,7 @@ from django.urls import reverse
 
 from Book.models import Book
 from Borrowing.models import Borrowing
+from Library.throttling import get_bucket
 from django.contrib.auth import get_user_model
 
 from Payment.models import Payment
@@ -15,6 +16,7 @@ User = get_user_model()
 
 class BorrowingCreateTestCase(APITestCase):
     def setUp(self):
+        get_bucket().reset()
         self.user = User.objects.create_user(
             email="test@example.com", password="pass1234"
         )
@@ -36,7 +38,7 @@ class BorrowingCreateTestCase(APITestCase):
         }
         response = self.client.post(reverse("Borrowing:borrowing-list"), data=data)
 
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
         self.assertIn("Book is not available", str(response.data))
         self.assertEqual(Borrowing.objects.count(), 0)
 
@@ -0,0 +1,76 @@
+import csv
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+
+
+class BorrowingExportTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("Borrowing:borrowing-export")
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="pass"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.user = get_user_model().objects.create_user(
+            email="reader@test.com", password="pass"
+        )
+        book = Book.objects.create(title="Dune", inventory=5, daily_fee=1)
+        self.active = Borrowing.objects.create(
+            user=self.user, book=book, expected_return_date="2030-01-05"
+        )
+        self.returned = Borrowing.objects.create(
+            user=self.user,
+            book=book,
+            expected_return_date="2030-01-05",
+            actual_return_date="2030-01-01",
+        )
+        Borrowing.objects.create(
+            user=self.admin, book=book, expected_return_date="2030-01-05"
+        )
+
+    def test_csv_with_list_filters(self):
+        response = self.client.get(
+            self.url, {"user_id": self.user.pk, "is_active": "false"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(
+            csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode()))
+        )
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "id": str(self.returned.pk),
+                    "user__email": "reader@test.com",
+                    "book__title": "Dune",
+                    "borrow_date": str(date.today()),
+                    "expected_return_date": "2030-01-05",
+                    "actual_return_date": "2030-01-01",
+                }
+            ],
+        )
+
+    def test_date_range(self):
+        response = self.client.get(
+            self.url, {"export_format": "jsonl", "date_to": "2000-01-01"}
+        )
+
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+    def test_only_admins(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
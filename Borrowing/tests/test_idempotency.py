@@ -0,0 +1,137 @@
+import uuid
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Library.throttling import get_bucket
+from Payment.models import Payment
+from Payment.services import attach_stripe_session
+
+User = get_user_model()
+
+
+def fake_stripe_session(borrowing, **kwargs):
+    session_id = f"cs_test_{uuid.uuid4().hex}"
+    return f"https://checkout.stripe.com/c/pay/{session_id}", session_id
+
+
+@patch("Payment.services.schedule_payment_expiry")
+@patch("Payment.services.create_stripe_session", side_effect=fake_stripe_session)
+class IdempotencyKeyTestCase(APITestCase):
+    def setUp(self):
+        get_bucket().reset()
+        cache.clear()
+        self.user = User.objects.create_user(email="retry@test.com", password="pass")
+        self.client.force_authenticate(user=self.user)
+        self.book = Book.objects.create(
+            title="Book", author="Author", inventory=5, daily_fee=1
+        )
+        self.url = reverse("Borrowing:borrowing-list")
+        self.data = {
+            "book": self.book.id,
+            "expected_return_date": date.today() + timedelta(days=7),
+        }
+
+    def post(self, data, key="key-1"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_create_is_replayed(self, mock_session, mock_expiry):
+        first = self.post(self.data)
+        second = self.post(self.data)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Borrowing.objects.count(), 1)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 4)
+        mock_session.assert_called_once()
+
+    def test_key_reused_with_other_body(self, mock_session, mock_expiry):
+        self.post(self.data)
+
+        response = self.post({**self.data, "expected_return_date": date.today()})
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_errors_are_replayed(self, mock_session, mock_expiry):
+        Book.objects.filter(pk=self.book.pk).update(inventory=0)
+        first = self.post(self.data)
+        Book.objects.filter(pk=self.book.pk).update(inventory=5)
+
+        second = self.post(self.data)
+
+        self.assertEqual(first.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(second.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Borrowing.objects.exists())
+
+    def test_keys_are_per_user(self, mock_session, mock_expiry):
+        self.post(self.data)
+        self.client.force_authenticate(
+            User.objects.create_user(email="other@test.com", password="pass")
+        )
+
+        response = self.post(self.data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Borrowing.objects.count(), 2)
+
+    def test_requests_without_key_are_not_deduplicated(self, mock_session, mock_expiry):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self.url, self.data)
+            # Unpaid payments block new borrowings.
+            Payment.objects.update(status="PAID")
+
+        self.assertEqual(Borrowing.objects.count(), 2)
+
+    def test_retried_return_is_replayed(self, mock_session, mock_expiry):
+        borrowing = Borrowing.objects.create(
+            user=self.user,
+            book=self.book,
+            expected_return_date=date.today() + timedelta(days=3),
+        )
+        url = reverse("Borrowing:borrowing-return-book", kwargs={"pk": borrowing.pk})
+
+        first = self.client.post(url, HTTP_IDEMPOTENCY_KEY="return-1")
+        second = self.client.post(url, HTTP_IDEMPOTENCY_KEY="return-1")
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 6)
+
+
+class CheckoutIdempotencyKeyTestCase(APITestCase):
+    def test_session_is_created_with_payment_idempotency_key(self):
+        user = User.objects.create_user(email="key@test.com", password="pass")
+        book = Book.objects.create(title="Book", inventory=5, daily_fee=1)
+        borrowing = Borrowing.objects.create(
+            user=user, book=book, expected_return_date=date.today()
+        )
+        payment = Payment.objects.create(
+            borrowing=borrowing, type="FINE", money_to_pay=4
+        )
+        session = type("Session", (), {"url": "https://stripe.test", "id": "cs_1"})
+
+        with patch(
+            "Payment.services.stripe_client.create_checkout_session",
+            return_value=session,
+        ) as mock_create, patch("Payment.services.schedule_payment_expiry"):
+            attach_stripe_session(payment, "https://ok", "https://cancel", "")
+
+        self.assertEqual(
+            mock_create.call_args.kwargs["idempotency_key"],
+            f"checkout:payment-{payment.pk}:FINE:4",
+        )
@@ -0,0 +1,88 @@
+import json
+from base64 import b64encode
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+
+
+class BorrowingPaginationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="pages@test.com", password="pass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        book = Book.objects.create(title="Book", inventory=1, daily_fee=1)
+        # More rows sharing one borrow_date than DRF's offset_cutoff (1000).
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                user=self.user,
+                book=book,
+                expected_return_date=date.today() + timedelta(days=7),
+            )
+            for _ in range(2200)
+        )
+        self.ids = list(
+            Borrowing.objects.order_by("borrow_date", "id").values_list("id", flat=True)
+        )
+
+    def collect(self, url, params=None):
+        ids, pages = [], []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = [borrowing["id"] for borrowing in response.data["results"]]
+            ids += page
+            pages.append(page)
+            if not response.data["next"]:
+                return ids, pages
+            # A repeating cursor would never end.
+            self.assertLess(len(pages), 10)
+            response = self.client.get(response.data["next"])
+
+    def test_pages_through_ties_on_borrow_date(self):
+        ids, pages = self.collect(
+            reverse("Borrowing:borrowing-list"), {"page_size": 500}
+        )
+
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(ids, self.ids)
+
+    def test_previous_links_walk_back(self):
+        _, pages = self.collect(reverse("Borrowing:borrowing-list"), {"page_size": 500})
+        response = self.client.get(
+            reverse("Borrowing:borrowing-list"), {"page_size": 500}
+        )
+        for _ in range(len(pages) - 1):
+            response = self.client.get(response.data["next"])
+
+        response = self.client.get(response.data["previous"])
+
+        self.assertEqual(
+            [borrowing["id"] for borrowing in response.data["results"]], pages[-2]
+        )
+
+    def test_edited_cursors_are_not_found(self):
+        for position in (
+            [str(date.today()), "abc"],
+            ["not a date", 1],
+            [str(date.today()), {"id": 1}],
+        ):
+            cursor = b64encode(urlencode({"p": json.dumps(position)}).encode())
+
+            response = self.client.get(
+                reverse("Borrowing:borrowing-list"), {"cursor": cursor.decode()}
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Library.query_budget import QueryBudgetExceeded, QueryBudgetMixin
+from Payment.models import Payment
+
+
+class QueryBudgetTestCase(TestCase):
+    """Endpoints stay within their query budget however many rows they list."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="budget@test.com", password="testpass"
+        )
+        # A real token, so the user lookup of JWT auth is counted too.
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZE=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+        books = Book.objects.bulk_create(
+            Book(title=f"Book {index}", author="Author", inventory=5, daily_fee=1)
+            for index in range(10)
+        )
+        for index in range(30):
+            borrowing = Borrowing.objects.create(
+                user=self.user,
+                book=books[index % len(books)],
+                expected_return_date=date.today() + timedelta(days=7),
+            )
+            Payment.objects.create(
+                borrowing=borrowing, status="PAID", type="PAYMENT", money_to_pay=7
+            )
+            Payment.objects.create(
+                borrowing=borrowing, status="PENDING", type="FINE", money_to_pay=3
+            )
+        self.borrowing = borrowing
+
+    def test_borrowing_list(self):
+        response = self.client.get(reverse("Borrowing:borrowing-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 30)
+        self.assertEqual(len(response.data["results"][0]["payments"]), 2)
+
+    def test_borrowing_retrieve(self):
+        response = self.client.get(
+            reverse("Borrowing:borrowing-detail", kwargs={"pk": self.borrowing.pk})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_payment_list_and_retrieve(self):
+        response = self.client.get(reverse("Payment:payments-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 50)
+
+        payment_id = response.data["results"][0]["id"]
+        response = self.client.get(
+            reverse("Payment:payments-detail", kwargs={"pk": payment_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_book_list(self):
+        response = self.client.get(reverse("book-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_me(self):
+        response = self.client.get(reverse("User:me"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.patch(
+            reverse("User:me"), {"first_name": "Budget"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BudgetedView(QueryBudgetMixin, APIView):
+    authentication_classes = []
+    permission_classes = []
+    query_budget = {"get": 1}
+
+    def get(self, request):
+        list(get_user_model().objects.all())
+        list(get_user_model().objects.all())
+        return Response()
+
+
+class QueryBudgetMixinTestCase(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/budgeted/")
+
+    @override_settings(QUERY_BUDGET_MODE="raise")
+    def test_overrun_raises(self):
+        with self.assertRaisesMessage(
+            QueryBudgetExceeded, "ran 2 queries, budget is 1"
+        ):
+            BudgetedView.as_view()(self.request)
+
+    @override_settings(QUERY_BUDGET_MODE="log")
+    def test_overrun_is_logged(self):
+        with self.assertLogs("Library.query_budget", level="WARNING"):
+            response = BudgetedView.as_view()(self.request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(QUERY_BUDGET_MODE="off")
+    def test_disabled(self):
+        response = BudgetedView.as_view()(self.request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
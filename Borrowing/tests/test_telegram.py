@@ -0,0 +1,124 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from Borrowing.models import TelegramMessage
+
+from Borrowing.telegram_send import (
+    LocalTransport,
+    MAX_MESSAGE_LENGTH,
+    build_digest,
+    flush_outbox,
+    get_transport,
+    send_telegram_message,
+)
+
+
+@override_settings(
+    TELEGRAM_TRANSPORT="Borrowing.telegram_send.LocalTransport",
+    TELEGRAM_CHAT_ID="42",
+)
+@patch("Borrowing.tasks.flush_telegram_outbox.apply_async")
+class TelegramOutboxTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        LocalTransport.outbox.clear()
+
+    def test_messages_are_queued_after_commit(self, mock_schedule):
+        with self.captureOnCommitCallbacks() as callbacks:
+            send_telegram_message("returned")
+
+        mock_schedule.assert_not_called()
+        for callback in callbacks:
+            callback()
+        mock_schedule.assert_called_once_with(countdown=5)
+
+    def test_burst_is_delivered_as_one_digest(self, mock_schedule):
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(3):
+                send_telegram_message(f"message {index}")
+
+        self.assertEqual(mock_schedule.call_count, 1)
+        self.assertEqual(flush_outbox(), 3)
+        self.assertEqual(
+            LocalTransport.outbox,
+            [("42", "message 0\n\nmessage 1\n\nmessage 2")],
+        )
+
+    def test_flush_does_not_resend(self, mock_schedule):
+        with self.captureOnCommitCallbacks(execute=True):
+            send_telegram_message("once")
+
+        flush_outbox()
+        self.assertEqual(flush_outbox(), 0)
+        self.assertEqual(len(LocalTransport.outbox), 1)
+
+    def test_message_after_flush_schedules_new_flush(self, mock_schedule):
+        with self.captureOnCommitCallbacks(execute=True):
+            send_telegram_message("first")
+        flush_outbox()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            send_telegram_message("second")
+
+        self.assertEqual(mock_schedule.call_count, 2)
+
+    def test_failed_delivery_keeps_messages(self, mock_schedule):
+        with self.captureOnCommitCallbacks(execute=True):
+            send_telegram_message("kept")
+
+        with patch.object(LocalTransport, "send", side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                flush_outbox()
+
+        self.assertEqual(flush_outbox(), 1)
+        self.assertEqual(LocalTransport.outbox, [("42", "kept")])
+
+    def test_retry_only_sends_parts_not_yet_sent(self, mock_schedule):
+        with self.captureOnCommitCallbacks(execute=True):
+            for text in ("a" * 3000, "b" * 3000, "c" * 3000):
+                send_telegram_message(text)
+        send = LocalTransport.send
+
+        def fail_on_second_part(transport, chat_id, text):
+            if text.startswith("b"):
+                raise ConnectionError
+            send(transport, chat_id, text)
+
+        with patch.object(LocalTransport, "send", fail_on_second_part):
+            with self.assertRaises(ConnectionError):
+                flush_outbox()
+
+        self.assertEqual(TelegramMessage.objects.count(), 2)
+        self.assertEqual(flush_outbox(), 2)
+        self.assertEqual(
+            [text[0] for _, text in LocalTransport.outbox], ["a", "b", "c"]
+        )
+
+    def test_messages_of_rolled_back_transactions_are_dropped(self, mock_schedule):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                send_telegram_message("never happened")
+                raise RuntimeError
+
+        mock_schedule.assert_not_called()
+        self.assertEqual(flush_outbox(), 0)
+
+
+class TelegramDigestTestCase(TestCase):
+    def test_digest_respects_message_length_limit(self):
+        texts = ["a" * 3000, "b" * 3000, "c" * 10]
+
+        parts = build_digest(texts)
+
+        self.assertEqual(len(parts), 2)
+        self.assertTrue(all(len(part) <= MAX_MESSAGE_LENGTH for part in parts))
+
+    def test_http_transport_uses_pooled_session_with_retries(self):
+        transport = get_transport()
+
+        adapter = transport.session.get_adapter("https://api.telegram.org")
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
@@ -0,0 +1,119 @@
+import uuid
+from unittest.mock import patch
+
+import redis
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from Library.throttling import RedisTokenBucket, get_bucket, parse_rate
+
+RATES = {"borrow": "2/min", "token": "2/min", "register": "1/min"}
+
+
+def redis_available():
+    try:
+        return redis.Redis(socket_connect_timeout=0.2).ping()
+    except redis.RedisError:
+        return False
+
+
+@override_settings(THROTTLE_BACKEND="local", THROTTLE_RATES=RATES)
+class TokenBucketThrottleTestCase(TestCase):
+    def setUp(self):
+        get_bucket().reset()
+        self.addCleanup(get_bucket().reset)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="throttle@test.com", password="pass"
+        )
+
+    def test_borrow_is_throttled_per_user(self):
+        url = reverse("Borrowing:borrowing-list")
+        self.client.force_authenticate(user=self.user)
+
+        # Rejected requests cost a token too: the check runs before any work.
+        statuses = [self.client.post(url, {}).status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [400, 400, 429])
+        response = self.client.post(url, {})
+        self.assertEqual(response["Retry-After"], "30")
+
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="other@test.com", password="pass"
+            )
+        )
+        self.assertEqual(self.client.post(url, {}).status_code, 400)
+
+    def test_listing_is_not_throttled(self):
+        self.client.force_authenticate(user=self.user)
+
+        for _ in range(5):
+            response = self.client.get(reverse("Borrowing:borrowing-list"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_token_and_register_are_throttled_per_ip(self):
+        credentials = {"email": "throttle@test.com", "password": "wrong"}
+        token_url = reverse("User:token_obtain_pair")
+        statuses = [self.client.post(token_url, credentials).status_code for _ in "abc"]
+        self.assertEqual(statuses, [401, 401, 429])
+
+        register_url = reverse("User:register")
+        statuses = [
+            self.client.post(
+                register_url,
+                {"email": f"{uuid.uuid4().hex}@test.com", "password": "secret"},
+            ).status_code
+            for _ in "ab"
+        ]
+        self.assertEqual(statuses, [201, 429])
+
+    def test_forwarded_for_cannot_dodge_the_ip_throttle(self):
+        credentials = {"email": "throttle@test.com", "password": "wrong"}
+        token_url = reverse("User:token_obtain_pair")
+
+        statuses = [
+            self.client.post(
+                token_url, credentials, HTTP_X_FORWARDED_FOR=f"10.0.0.{index}"
+            ).status_code
+            for index in range(3)
+        ]
+
+        self.assertEqual(statuses, [401, 401, 429])
+
+    @override_settings(
+        THROTTLE_BACKEND="redis", THROTTLE_REDIS_URL="redis://127.0.0.1:1/0"
+    )
+    def test_unreachable_redis_lets_requests_through(self):
+        self.client.force_authenticate(user=self.user)
+
+        with patch.dict("Library.throttling._buckets", clear=True), self.assertLogs(
+            "Library.throttling", "WARNING"
+        ):
+            statuses = [
+                self.client.post(reverse("Borrowing:borrowing-list"), {}).status_code
+                for _ in range(3)
+            ]
+
+        self.assertEqual(statuses, [400, 400, 400])
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("10/min"), (10, 10 / 60))
+        self.assertEqual(parse_rate("5/s"), (5, 5))
+
+
+class RedisTokenBucketTestCase(TestCase):
+    def test_script(self):
+        if not redis_available():
+            self.skipTest("Redis is not running")
+        bucket = RedisTokenBucket("redis://localhost:6379/15")
+        key = f"throttle:test:{uuid.uuid4().hex}"
+        self.addCleanup(bucket.client.delete, key)
+
+        results = [bucket.take(key, 2, 1 / 60) for _ in range(3)]
+
+        self.assertEqual([allowed for allowed, _ in results], [True, True, False])
+        self.assertAlmostEqual(results[2][1], 60, delta=1)
@@ -1,5 +1,6 @@
 from datetime import datetime
 
+from django.db.models import Count, Max, Prefetch
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 from rest_framework import viewsets, permissions, status
@@ -14,9 +15,61 @@ from Borrowing.serializers import (
 )
 
 from Borrowing.telegram_send import send_telegram_message
-
-
-class BorrowingViewSet(viewsets.ModelViewSet):
+from Library.conditional import ConditionalGetMixin
+from Library.export import ExportQuerySerializer, export_response
+from Library.idempotency import idempotent
+from Library.pagination import BorrowingCursorPagination
+from Library.query_budget import QueryBudgetMixin
+from Library.throttling import UserTokenBucketThrottle
+from Payment.models import Payment
+
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name="Idempotency-Key",
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description="Retries with the same key return the first response instead of "
+    "repeating the request.",
+)
+BORROWING_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name="is_active",
+        type=OpenApiTypes.BOOL,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description="True — active (not returned) borrowings; False — returned.",
+    ),
+    OpenApiParameter(
+        name="user_id",
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description="(Only admins) Users borrowings.",
+    ),
+]
+EXPORT_COLUMNS = [
+    "id",
+    "user__email",
+    "book__title",
+    "borrow_date",
+    "expected_return_date",
+    "actual_return_date",
+]
+
+
+class BorrowingViewSet(QueryBudgetMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    pagination_class = BorrowingCursorPagination
+    throttle_classes = [UserTokenBucketThrottle]
+    throttle_scope = {"create": "borrow", "return_book": "borrow_return"}
+    query_budget = {
+        "list": 4,
+        "retrieve": 4,
+        "create": 12,
+        "return_book": 12,
+        # Export rows are fetched while the response streams, after dispatch.
+        "export": 1,
+    }
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
@@ -37,7 +90,9 @@ class BorrowingViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Borrowing.objects.select_related("user", "book").all()
+        queryset = Borrowing.objects.select_related("user", "book").prefetch_related(
+            Prefetch("payments", queryset=Payment.objects.all())
+        )
 
         if not (user.is_superuser or user.is_staff):
             queryset = queryset.filter(user=user)
@@ -57,38 +112,73 @@ class BorrowingViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def get_conditional_state(self):
+        # Borrowings embed their payments, so payment status changes count too.
+        state = self.get_conditional_queryset().aggregate(
+            last_modified=Max("updated_at"),
+            payments_modified=Max("payments__updated_at"),
+            count=Count("pk", distinct=True),
+        )
+        last_modified = max(
+            filter(None, (state["last_modified"], state["payments_modified"])),
+            default=None,
+        )
+        return (state["count"],), last_modified
+
     @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="is_active",
-                type=OpenApiTypes.BOOL,
-                location=OpenApiParameter.QUERY,
-                required=False,
-                description="True — active (not returned) borrowings; False — returned.",
-            ),
-            OpenApiParameter(
-                name="user_id",
-                type=OpenApiTypes.INT,
-                location=OpenApiParameter.QUERY,
-                required=False,
-                description="(Only admins) Users borrowings.",
-            ),
-        ],
-        responses={
-            200: BorrowingSerializer(many=True)
-        },
+        parameters=BORROWING_FILTER_PARAMETERS,
+        responses={200: BorrowingSerializer(many=True)},
         description="Take a Borrowings list, Admin can filter by id.",
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[ExportQuerySerializer, *BORROWING_FILTER_PARAMETERS],
+        responses={(200, "text/csv"): OpenApiTypes.BINARY},
+        description="Stream borrowings as CSV or JSON Lines, optionally gzipped. "
+        "Only admins. Same filters as the list, plus a borrow_date range.",
+    )
+    @action(detail=False, methods=["GET"])
+    def export(self, request):
+        params = ExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+
+        queryset = self.get_queryset().prefetch_related(None).order_by("pk")
+        if "date_from" in options:
+            queryset = queryset.filter(borrow_date__gte=options["date_from"])
+        if "date_to" in options:
+            queryset = queryset.filter(borrow_date__lte=options["date_to"])
+
+        return export_response(
+            queryset,
+            EXPORT_COLUMNS,
+            "borrowings",
+            export_format=options["export_format"],
+            gzip=options["gzip"],
+        )
+
     @extend_schema(
         request=BorrowingSerializer,
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={201: BorrowingDetailSerializer},
-        description="Create borrowing. Get down amount in inventory and created payment in strip.",
+        description="Create borrowing. Get down amount in inventory and created payment in strip. The payment session_url is empty if Stripe is unavailable; it is filled in later.",
     )
+    @idempotent
     def create(self, request, *args, **kwargs):
-        return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        # The Stripe session is created right after commit, so the payments
+        # read here already carry the checkout URL when Stripe answered.
+        data = BorrowingDetailSerializer(
+            serializer.instance, context=self.get_serializer_context()
+        ).data
+        return Response(
+            data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data)
+        )
 
     @extend_schema(
         methods=["GET"],
@@ -102,6 +192,7 @@ class BorrowingViewSet(viewsets.ModelViewSet):
     @extend_schema(
         methods=["POST"],
         description="Return a borrowed book. Sets actual return date, increases inventory. Creates a fine if overdue.",
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             200: ReturnBorrowingSerializer,
             400: OpenApiResponse(description="Book already returned or invalid data"),
@@ -116,6 +207,7 @@ class BorrowingViewSet(viewsets.ModelViewSet):
         url_path="return",
         permission_classes=[permissions.IsAuthenticated],
     )
+    @idempotent
     def return_book(self, request, pk=None):
         borrowing = self.get_object()
 
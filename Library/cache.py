@@ -0,0 +1,67 @@
+import time
+
+from django.core.cache import cache
+
+
+_MISSING = object()
+
+
+class BuildUnavailable(Exception):
+    """Another caller is building the value, or just failed to."""
+
+
+def incr_counter(key, delta=1):
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The counter was evicted between add() and incr().
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def get_or_build(
+    key,
+    build,
+    timeout,
+    lock_timeout=10,
+    wait_timeout=5,
+    poll=0.05,
+    waiters_build=True,
+):
+    """
+    Read-through cache lookup with single-flight rebuild.
+
+    On a miss only the caller that wins the ``cache.add`` lock runs ``build``;
+    concurrent callers poll for its result instead of rebuilding themselves.
+    If the builder fails or is too slow they run ``build`` after all, or with
+    ``waiters_build=False`` raise ``BuildUnavailable``, for builds that must
+    not be repeated by every waiter when the backend behind them struggles.
+    Returns ``(value, hit)``.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value, True
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        try:
+            value = build()
+            cache.set(key, value, timeout=timeout)
+        finally:
+            cache.delete(lock_key)
+        return value, False
+
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value, True
+        if cache.get(lock_key) is None:
+            break
+
+    # The builder failed or is too slow: do not let this request wait forever.
+    if not waiters_build:
+        raise BuildUnavailable(key)
+    return build(), False
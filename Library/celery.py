@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun, worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Library.settings")
 
@@ -8,9 +9,44 @@ app = Celery("Library")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
+
+@worker_process_init.connect
+def use_persistent_db_connections(**kwargs):
+    # Celery's Django fixup then reuses the connection across tasks for
+    # CONN_MAX_AGE and replaces it once it is unusable.
+    from django.conf import settings
+
+    from Library.db import use_persistent_connections
+
+    use_persistent_connections(settings.DB_WORKER_CONN_MAX_AGE)
+
+
+@task_prerun.connect
+def start_task_timer(task_id, **kwargs):
+    from Library.metrics import task_started
+
+    task_started(task_id)
+
+
+@task_postrun.connect
+def record_task_metrics(task_id, task, state=None, **kwargs):
+    from Library.metrics import task_finished
+
+    task_finished(task_id, task.name, state)
+
 app.conf.beat_schedule = {
-    "expire-old-payments-every-hour": {
+    # Payments normally expire on their own schedule; this only catches
+    # the ones whose expiry task was lost.
+    "expire-old-payments": {
         "task": "Payment.tasks.expire_old_payments",
-        "schedule": crontab(minute=0, hour="*"),
+        "schedule": crontab(minute="*/15"),
+    },
+    "rebuild-payment-stats": {
+        "task": "Payment.tasks.rebuild_payment_stats",
+        "schedule": crontab(minute=0, hour=4),
+    },
+    "reconcile-stripe-payments": {
+        "task": "Payment.tasks.reconcile_stripe_payments",
+        "schedule": crontab(minute=30, hour=3),
     },
 }
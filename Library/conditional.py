@@ -0,0 +1,73 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match`` / ``If-Modified-Since`` on list and retrieve.
+
+    Validators come from a single aggregate (max ``updated_at`` plus count)
+    over the filtered queryset, so a 304 is returned before any row is
+    fetched or serialized. Lists only get an ETag: rows that are deleted or
+    leave the filter do not move their ``Last-Modified``, but change the count.
+    """
+
+    def get_conditional_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+
+        return queryset.order_by()
+
+    def get_conditional_state(self):
+        """Return ``(etag_parts, last_modified)`` for the current request."""
+        state = self.get_conditional_queryset().aggregate(
+            last_modified=Max("updated_at"), count=Count("pk")
+        )
+        return (state["count"],), state["last_modified"]
+
+    def conditional_response(self, request, build, send_last_modified=True):
+        etag_parts, last_modified = self.get_conditional_state()
+
+        user_id = request.user.pk if request.user.is_authenticated else None
+        fingerprint = repr(
+            (user_id, request.get_full_path(), etag_parts, last_modified)
+        )
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        last_modified = (
+            send_last_modified and last_modified and last_modified.timestamp()
+        )
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = build()
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+            patch_vary_headers(response, ("Authorize",))
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+            send_last_modified=False,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
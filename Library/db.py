@@ -0,0 +1,31 @@
+from django.db import connections
+
+
+def pool_stats():
+    """
+    Counters of each database's psycopg pool in this process.
+
+    Keys are database aliases; the value is ``ConnectionPool.get_stats()``
+    (size, available and waiting connections, request and error counts) or
+    ``None`` for a database without a pool.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        stats[alias] = pool.get_stats() if pool is not None else None
+    return stats
+
+
+def use_persistent_connections(max_age):
+    """
+    Replace connection pools with one persistent connection per thread.
+
+    For Celery prefork workers: each process runs one task at a time, so a
+    pool buys nothing, and one inherited from the parent would share its
+    sockets but not its threads. Call before the process connects.
+    """
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        if settings_dict["OPTIONS"].pop("pool", None):
+            settings_dict["CONN_MAX_AGE"] = max_age
+            settings_dict["CONN_HEALTH_CHECKS"] = True
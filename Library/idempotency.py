@@ -0,0 +1,98 @@
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _fingerprint(data):
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Make a view method safe to retry with an ``Idempotency-Key`` header.
+
+    The first response that is not a server error is stored for
+    ``IDEMPOTENCY_KEY_TTL`` seconds per user, path and key. Repeats get it
+    back with ``Idempotent-Replayed: true`` without running the view again.
+    Reusing a key with a different body is a 422, and repeating a request
+    that is still running is a 409. Requests without the header are not
+    affected.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or request.method in SAFE_METHODS:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        scope = f"{request.user.pk}:{request.method}:{request.path}:{key}"
+        cache_key = f"idempotency:{hashlib.sha256(scope.encode()).hexdigest()}"
+        lock_key = f"{cache_key}:lock"
+        fingerprint = _fingerprint(request.data)
+
+        stored = cache.get(cache_key)
+        if stored is None:
+            if not cache.add(lock_key, 1, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                return Response(
+                    {"detail": f"A request with this {HEADER} is still in progress."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            try:
+                # The first request may have finished between get() and add().
+                stored = cache.get(cache_key)
+                if stored is None:
+                    try:
+                        response = view_method(self, request, *args, **kwargs)
+                    except Exception as exc:
+                        response = self.handle_exception(exc)
+
+                    if response.status_code < 500:
+                        cache.set(
+                            cache_key,
+                            {
+                                "fingerprint": fingerprint,
+                                "status": response.status_code,
+                                "data": response.data,
+                                "headers": {
+                                    name: response[name]
+                                    for name in ("Location",)
+                                    if response.has_header(name)
+                                },
+                            },
+                            timeout=settings.IDEMPOTENCY_KEY_TTL,
+                        )
+                    return response
+            finally:
+                cache.delete(lock_key)
+
+        if stored["fingerprint"] != fingerprint:
+            return Response(
+                {"detail": f"{HEADER} was already used with a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        response = Response(
+            stored["data"], status=stored["status"], headers=stored["headers"]
+        )
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    return wrapper
@@ -0,0 +1,127 @@
+import hmac
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from Library.query_budget import QueryCounter
+
+# With PROMETHEUS_MULTIPROC_DIR set (before start-up, to an empty directory
+# shared by the Gunicorn or Celery worker processes) every process writes its
+# samples there and /metrics adds them up.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+# Any other method, as sent by the client, is recorded as "other".
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to respond, by URL name.",
+    ["method", "route", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL queries run per request, on all databases, by URL name.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+EXTERNAL_CALL_LATENCY = Histogram(
+    "external_call_duration_seconds",
+    "Duration of calls to external services.",
+    ["service", "operation"],
+)
+EXTERNAL_CALL_ERRORS = Counter(
+    "external_call_errors_total",
+    "Failed calls to external services, by exception class.",
+    ["service", "operation", "error"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Read-through cache lookups, by cache and result (hit or miss).",
+    ["cache", "result"],
+)
+TASK_LATENCY = Histogram(
+    "celery_task_duration_seconds",
+    "Run time of Celery tasks.",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, float("inf")),
+)
+TASK_RESULTS = Counter(
+    "celery_task_results_total",
+    "Finished Celery task runs, by state (SUCCESS, FAILURE, RETRY, ...).",
+    ["task", "state"],
+)
+
+
+def observe_external_call(service, operation, duration, error=None):
+    """Record a call; ``duration`` is None for calls that were never made."""
+    if duration is not None:
+        EXTERNAL_CALL_LATENCY.labels(service, operation).observe(duration)
+    if error is not None:
+        EXTERNAL_CALL_ERRORS.labels(service, operation, type(error).__name__).inc()
+
+
+class MetricsMiddleware:
+    """Record latency and SQL query count of every request by URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        # URL names, not paths, keep the label values bounded.
+        match = request.resolver_match
+        route = match.view_name if match else "unmatched"
+        method = request.method if request.method in METHODS else "other"
+        REQUEST_LATENCY.labels(method, route, response.status_code).observe(duration)
+        REQUEST_QUERIES.labels(method, route).observe(queries.count)
+        return response
+
+
+def metrics_view(request):
+    """Prometheus text format. Needs ``Bearer <METRICS_TOKEN>`` if set."""
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.META.get("HTTP_AUTHORIZATION", "").encode(),
+        f"Bearer {token}".encode(),
+    ):
+        return HttpResponse(status=401)
+
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+_task_started = {}
+
+
+def task_started(task_id):
+    _task_started[task_id] = time.perf_counter()
+
+
+def task_finished(task_id, task_name, state):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_LATENCY.labels(task_name).observe(time.perf_counter() - started)
+    TASK_RESULTS.labels(task_name, state or "UNKNOWN").inc()
@@ -0,0 +1,123 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class LibraryCursorPagination(CursorPagination):
+    """
+    Keyset pagination: every page is a range scan on an indexed ordering,
+    so deep pages cost the same as the first one and no COUNT(*) is issued.
+
+    Unlike DRF's cursor, which only filters on the first ordering field and
+    falls back to OFFSET for ties, the position holds every ordering field,
+    so the ordering must end in a unique field.
+    """
+
+    ordering = ("-id",)
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    page_size_query_param = "page_size"
+    max_page_size = settings.REST_FRAMEWORK["MAX_PAGE_SIZE"]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None and self.cursor.position is not None:
+            try:
+                queryset = queryset.filter(self._after(ordering, self.cursor.position))
+            except (TypeError, ValueError, ValidationError):
+                # A position edited by the client, e.g. a string for the id.
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[: self.page_size + 1])
+        has_following = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def _link(self, instance, reverse):
+        position = [getattr(instance, field.lstrip("-")) for field in self.ordering]
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=reverse,
+                position=json.dumps(position, cls=DjangoJSONEncoder),
+            )
+        )
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def _after(ordering, position):
+        # (a, b, c) after (x, y, z): a > x, or a = x and b > y, or ...
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            ties = {f.lstrip("-"): v for f, v in zip(ordering[:index], position)}
+            condition |= Q(**ties, **{f"{name}__{lookup}": position[index]})
+        return condition
+
+
+class BookCursorPagination(LibraryCursorPagination):
+    ordering = ("id",)
+
+    def get_ordering(self, request, queryset, view):
+        # Full-text search results are ranked, best match first.
+        if "rank" in queryset.query.annotations:
+            return ("-rank", "id")
+        return super().get_ordering(request, queryset, view)
+
+
+class BorrowingCursorPagination(LibraryCursorPagination):
+    ordering = ("borrow_date", "id")
+
+
+class PaymentCursorPagination(LibraryCursorPagination):
+    # Matches Payment.Meta.ordering.
+    ordering = ("-id",)
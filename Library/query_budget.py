@@ -0,0 +1,65 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """
+    Declare how many SQL queries a view may run per request.
+
+    ``query_budget`` is either an int for every action or a dict keyed by
+    viewset action (or lower-case HTTP method for plain API views). Actions
+    without a budget are not checked. ``settings.QUERY_BUDGET_MODE`` picks
+    what happens on overrun: ``"raise"`` (tests), ``"log"`` or ``"off"``.
+    """
+
+    query_budget = None
+
+    def get_query_budget(self):
+        if not isinstance(self.query_budget, dict):
+            return self.query_budget
+
+        action = getattr(self, "action", None) or self.request.method.lower()
+        return self.query_budget.get(action)
+
+    def dispatch(self, request, *args, **kwargs):
+        mode = settings.QUERY_BUDGET_MODE
+        if mode == "off" or self.query_budget is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        counter = QueryCounter()
+        # Every alias, so reads sent to a replica count too.
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = super().dispatch(request, *args, **kwargs)
+
+        budget = self.get_query_budget()
+        if budget is not None and counter.count > budget:
+            action = getattr(self, "action", None) or request.method.lower()
+            message = (
+                f"{type(self).__name__}.{action} ran {counter.count} queries, "
+                f"budget is {budget} ({request.method} {request.path})"
+            )
+            if mode == "raise":
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
@@ -0,0 +1,123 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.throttling import BaseThrottle
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Routing state of the current request: whether its reads may go to a
+# replica and whether it has written. Outside requests (Celery, management
+# commands) everything stays on the primary.
+_routing = ContextVar("db_routing", default=None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads of safe requests to a random ``DATABASE_REPLICAS`` alias.
+
+    Writes, reads inside a transaction and every read after the request's
+    first write go to the primary, so a request always reads its own writes.
+    Sessions are always read from the primary, as the client that just
+    saved one may not be pinned to it yet.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if not (state and state["replica_reads"] and settings.DATABASE_REPLICAS):
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label == "sessions":
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state["replica_reads"] = False
+            state["wrote"] = True
+        # Explicitly, or Django would write back to the replica an instance
+        # was read from.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+@contextmanager
+def primary_reads():
+    """
+    Read from the primary inside the block, for results that outlive the
+    request (shared caches) and so must not come from a lagging replica.
+    """
+    state = _routing.get()
+    if state is None:
+        yield
+        return
+
+    replica_reads = state["replica_reads"]
+    state["replica_reads"] = False
+    try:
+        yield
+    finally:
+        state["replica_reads"] = replica_reads and not state["wrote"]
+
+
+def _pin_key(request):
+    # Before authentication, so keyed by the raw credentials or, like the
+    # per-IP throttles, the client address resolved with NUM_PROXIES.
+    client = request.META.get("HTTP_AUTHORIZE") or BaseThrottle().get_ident(request)
+    return f"replica-pin:{hashlib.sha256(str(client).encode()).hexdigest()}"
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let safe requests read from replicas.
+
+    After a request writes, the same client reads from the primary for
+    ``REPLICA_LAG_TOLERANCE`` seconds, so it sees its writes even if the
+    replicas lag behind. Views can opt out with ``replica_reads = False``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = settings.REPLICA_LAG_TOLERANCE and cache.get(_pin_key(request))
+        state = {
+            "replica_reads": request.method in SAFE_METHODS and not pinned,
+            "wrote": False,
+        }
+        _routing.set(state)
+
+        response = self.get_response(request)
+
+        if state["wrote"] and settings.REPLICA_LAG_TOLERANCE:
+            cache.set(_pin_key(request), True, timeout=settings.REPLICA_LAG_TOLERANCE)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "cls", None)
+        if not getattr(view_class, "replica_reads", True):
+            _routing.get()["replica_reads"] = False
+
+
+def _reset_routing(**kwargs):
+    # On response close, after streamed responses have been read too.
+    _routing.set(None)
+
+
+request_finished.connect(_reset_routing)
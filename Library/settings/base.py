@@ -48,7 +48,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "Library.metrics.MetricsMiddleware",
+    "Library.timing.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Before SessionMiddleware, so the session save counts as a write.
+    "Library.routers.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -59,6 +63,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "Library.urls"
 
+# Aliases in DATABASES that replicate "default". Safe requests read from them;
+# after a write the client stays on the primary for REPLICA_LAG_TOLERANCE
+# seconds (0 only keeps the writing request itself on the primary).
+DATABASE_ROUTERS = ["Library.routers.PrimaryReplicaRouter"]
+DATABASE_REPLICAS = []
+REPLICA_LAG_TOLERANCE = int(os.getenv("REPLICA_LAG_TOLERANCE", 5))
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -123,10 +134,17 @@ AUTH_USER_MODEL = "User.Customer"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "User.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "Library.pagination.LibraryCursorPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", 50)),
+    "MAX_PAGE_SIZE": int(os.getenv("API_MAX_PAGE_SIZE", 500)),
+    # Reverse proxies in front of the app. Per-IP throttles take the client
+    # address this many hops from the end of X-Forwarded-For (0: the socket
+    # address); unset, DRF would trust the whole client-supplied header.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
 }
 
 SIMPLE_JWT = {
@@ -138,6 +156,20 @@ SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
 }
+# Authenticated users are cached per process and in CACHES (seconds).
+AUTH_USER_LOCAL_CACHE_SIZE = int(os.getenv("AUTH_USER_LOCAL_CACHE_SIZE", 1024))
+AUTH_USER_LOCAL_CACHE_TTL = int(os.getenv("AUTH_USER_LOCAL_CACHE_TTL", 10))
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 300))
+# Processes that hash passwords in bulk_register_users, the processes each web
+# worker keeps for the bulk registration endpoint, its size limit (hashed
+# within the request, so keep it small; import more with the command) and
+# the users per Celery task it queues.
+USER_BULK_HASH_WORKERS = int(
+    os.getenv("USER_BULK_HASH_WORKERS", os.cpu_count() or 1)
+)
+USER_BULK_REQUEST_HASH_WORKERS = int(os.getenv("USER_BULK_REQUEST_HASH_WORKERS", 2))
+USER_BULK_MAX_USERS = int(os.getenv("USER_BULK_MAX_USERS", 100))
+USER_BULK_TASK_SIZE = int(os.getenv("USER_BULK_TASK_SIZE", 100))
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Library Service API",
@@ -149,10 +181,100 @@ SPECTACULAR_SETTINGS = {
 
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+# Point at a fake Stripe server for tests and benchmarks.
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")
+# (connect, read) seconds
+STRIPE_TIMEOUT = (3.05, float(os.getenv("STRIPE_READ_TIMEOUT", 10)))
+STRIPE_MAX_RETRIES = int(os.getenv("STRIPE_MAX_RETRIES", 2))
+STRIPE_POOL_SIZE = int(os.getenv("STRIPE_POOL_SIZE", 10))
+# Consecutive outage errors before failing fast, and for how many seconds.
+STRIPE_BREAKER_THRESHOLD = int(os.getenv("STRIPE_BREAKER_THRESHOLD", 5))
+STRIPE_BREAKER_RESET_TIMEOUT = int(os.getenv("STRIPE_BREAKER_RESET_TIMEOUT", 30))
+# How long repeated success callbacks share one Checkout Session lookup.
+STRIPE_SESSION_CACHE_TTL = int(os.getenv("STRIPE_SESSION_CACHE_TTL", 5))
 FINE_MULTIPLIER = int(os.getenv("FINE_MULTIPLIER", 2))
 
+TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_TRANSPORT = os.getenv(
+    "TELEGRAM_TRANSPORT", "Borrowing.telegram_send.HttpTransport"
+)
+TELEGRAM_TIMEOUT = (3.05, 10)
+TELEGRAM_MAX_RETRIES = 3
+TELEGRAM_DIGEST_WINDOW = int(os.getenv("TELEGRAM_DIGEST_WINDOW", 5))
+TELEGRAM_MESSAGES_PER_MINUTE = 20
+
+
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_URL", f"redis://{REDIS_HOST}:6379/1"),
+    }
+}
+
+# Token buckets for the expensive endpoints: "redis" (shared by all
+# processes) or "local" (per process, for a single dev server).
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "redis")
+THROTTLE_REDIS_URL = os.getenv("THROTTLE_REDIS_URL", f"redis://{REDIS_HOST}:6379/1")
+# Burst size per period; the bucket refills evenly over the period.
+THROTTLE_RATES = {
+    "borrow": os.getenv("THROTTLE_RATE_BORROW", "10/min"),
+    "borrow_return": os.getenv("THROTTLE_RATE_BORROW_RETURN", "20/min"),
+    "token": os.getenv("THROTTLE_RATE_TOKEN", "10/min"),
+    "register": os.getenv("THROTTLE_RATE_REGISTER", "5/min"),
+}
+
+# What to do when a view runs more SQL queries than its query_budget:
+# "raise", "log" or "off".
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "log")
+
+# Server-Timing headers and per-request timing logs for a sampled fraction of
+# requests; requests slower than SERVER_TIMING_SLOW_MS are logged as warnings
+# with their slowest SQL statements.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "").lower() in ("1", "true", "yes")
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", 1.0))
+SERVER_TIMING_SLOW_MS = float(os.getenv("SERVER_TIMING_SLOW_MS", 500))
+SERVER_TIMING_TOP_QUERIES = int(os.getenv("SERVER_TIMING_TOP_QUERIES", 5))
+
+# /metrics requires "Authorization: Bearer <METRICS_TOKEN>" when set.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Days of the payment rollup the nightly rebuild checks against the payments.
+PAYMENT_STATS_REBUILD_DAYS = int(os.getenv("PAYMENT_STATS_REBUILD_DAYS", 35))
+
+# A RUNNING reconciliation without progress for this many seconds is taken
+# to have lost its worker and may be resumed by the next one.
+RECONCILIATION_STALE_AFTER = int(os.getenv("RECONCILIATION_STALE_AFTER", 15 * 60))
+
+# Stripe Checkout Sessions, and their payments, expire this many seconds after
+# the payment is created. Clamped to what Stripe accepts (30 minutes to 24
+# hours, with a minute of slack for the session request itself).
+PAYMENT_SESSION_TTL = min(
+    max(int(os.getenv("PAYMENT_SESSION_TTL", 60 * 60)), 31 * 60), 24 * 60 * 60
+)
+
+# Responses stored for replays of requests with an Idempotency-Key header.
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+BOOK_CACHE_TIMEOUT = int(os.getenv("BOOK_CACHE_TIMEOUT", 300))
+
+# Rows fetched per server-side cursor round trip by the export endpoints.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+
+# Seconds a Celery worker process keeps its database connection between
+# tasks when the web processes use a connection pool (see Library/db.py).
+DB_WORKER_CONN_MAX_AGE = int(os.getenv("DB_WORKER_CONN_MAX_AGE", 600))
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+# Redis redelivers unacknowledged tasks after the visibility timeout, so it must
+# outlast the longest ETA (payment expiry, scheduled up to a few minutes after
+# the payment is created) to avoid early duplicates.
+CELERY_BROKER_TRANSPORT_OPTIONS = {"visibility_timeout": PAYMENT_SESSION_TTL + 60 * 60}
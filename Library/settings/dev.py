@@ -6,5 +6,25 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+        # A file-backed test database lets concurrency tests run several
+        # writers at once instead of failing on shared-cache table locks.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
-}
\ No newline at end of file
+}
+# A second connection to the same file stands in for a read replica, so the
+# replica routing runs locally; tests mirror it onto the test database.
+DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+DATABASE_REPLICAS = ["replica"]
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+QUERY_BUDGET_MODE = "raise"
+
+SERVER_TIMING_ENABLED = True
+
+THROTTLE_BACKEND = "local"
@@ -1,5 +1,8 @@
+import copy
 import os
 
+from .base import *
+
 DEBUG = False
 
 ALLOWED_HOSTS = [
@@ -7,6 +10,11 @@ ALLOWED_HOSTS = [
     "localhost",
 ]
 
+# Connections come from a psycopg pool per process by default. Set
+# DB_POOL=false behind an external pooler such as PgBouncer to keep one
+# persistent, health-checked connection per thread instead.
+DB_POOL = os.getenv("DB_POOL", "true").lower() in ("1", "true", "yes")
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -15,5 +23,36 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST", "db"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        # Pooled connections are returned to the pool instead.
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        # With a pool: only hand out connections that still work, e.g. after
+        # a failover.
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
 }
+
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+        # Seconds a request waits for a free connection before failing.
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", 600)),
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", 3600)),
+    }
+
+# Comma-separated hosts of streaming replicas of the primary, e.g.
+# "replica-1,replica-2". Each gets an alias like the primary's.
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), start=1
+):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "OPTIONS": copy.deepcopy(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
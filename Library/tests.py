@@ -0,0 +1,399 @@
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_finished
+from django.db import connections, transaction
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Book.models import Book
+from Payment import stripe_client
+from Payment.tasks import expire_old_payments
+from Library.db import pool_stats, use_persistent_connections
+from Library.metrics import metrics_view
+from Library.routers import ReplicaRoutingMiddleware
+from Library.timing import ServerTimingMiddleware, track
+
+POOLED = {
+    "default": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": "library",
+        "OPTIONS": {"pool": {"min_size": 2, "max_size": 4}},
+    }
+}
+
+
+class DatabasePoolTestCase(SimpleTestCase):
+    def test_pool_stats(self):
+        pool = Mock(**{"get_stats.return_value": {"pool_size": 2}})
+        fake_connections = {"default": Mock(pool=pool), "other": Mock(pool=None)}
+
+        with patch("Library.db.connections", fake_connections):
+            self.assertEqual(pool_stats(), {"default": {"pool_size": 2}, "other": None})
+
+    def test_workers_use_persistent_connections(self):
+        connections = ConnectionHandler(POOLED)
+        self.assertIsNotNone(connections["default"].pool)
+        connections["default"].close_pool()
+
+        with patch("Library.db.connections", connections):
+            use_persistent_connections(300)
+
+        settings_dict = connections["default"].settings_dict
+        self.assertNotIn("pool", settings_dict["OPTIONS"])
+        self.assertEqual(settings_dict["CONN_MAX_AGE"], 300)
+        self.assertTrue(settings_dict["CONN_HEALTH_CHECKS"])
+        self.assertIsNone(connections["default"].pool)
+
+
+class DatabasePoolStatsViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("db-pool-stats")
+
+    def test_admin_sees_stats(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser(
+                email="admin@test.com", password="pass"
+            )
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The SQLite test databases have no pool.
+        self.assertEqual(response.data, {"default": None, "replica": None})
+
+    def test_only_admins(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(email="user@test.com", password="x")
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+def read_db(request):
+    return HttpResponse(Book.objects.all().db)
+
+
+def write_then_read_db(request):
+    Book.objects.create(title="New", inventory=1, daily_fee=1)
+    return read_db(request)
+
+
+def primary_view(request):
+    return read_db(request)
+
+
+primary_view.cls = type("PrimaryView", (), {"replica_reads": False})
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_LAG_TOLERANCE=5)
+class ReplicaRoutingTestCase(TransactionTestCase):
+    # Not TestCase: its transaction would keep every read on the primary.
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, view, method="get", token="Bearer a", **extra):
+        if token:
+            extra["HTTP_AUTHORIZE"] = token
+        request = getattr(self.factory, method)("/", **extra)
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        request_finished.send(sender=None)
+        return response.content.decode()
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.request(read_db), "replica")
+        self.assertEqual(self.request(read_db, method="post"), "default")
+
+    def test_reads_after_write_use_primary(self):
+        self.assertEqual(self.request(write_then_read_db), "default")
+
+        # The writing client stays on the primary while replicas catch up.
+        self.assertEqual(self.request(read_db), "default")
+        self.assertEqual(self.request(read_db, token="Bearer b"), "replica")
+
+    @override_settings(REPLICA_LAG_TOLERANCE=0)
+    def test_without_lag_tolerance_only_the_writing_request_is_pinned(self):
+        self.assertEqual(self.request(write_then_read_db), "default")
+        self.assertEqual(self.request(read_db), "replica")
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1})
+    def test_anonymous_clients_are_pinned_by_their_own_address(self):
+        self.assertEqual(
+            self.request(
+                write_then_read_db, token=None, HTTP_X_FORWARDED_FOR="1.1.1.1"
+            ),
+            "default",
+        )
+
+        self.assertEqual(
+            self.request(read_db, token=None, HTTP_X_FORWARDED_FOR="1.1.1.1"),
+            "default",
+        )
+        self.assertEqual(
+            self.request(read_db, token=None, HTTP_X_FORWARDED_FOR="2.2.2.2"),
+            "replica",
+        )
+
+    def test_sessions_are_read_from_the_primary(self):
+        def read_session_db(request):
+            return HttpResponse(Session.objects.all().db)
+
+        self.assertEqual(self.request(read_session_db), "default")
+
+    def test_session_saves_happen_inside_the_routing(self):
+        middleware = settings.MIDDLEWARE
+        self.assertLess(
+            middleware.index("Library.routers.ReplicaRoutingMiddleware"),
+            middleware.index("django.contrib.sessions.middleware.SessionMiddleware"),
+        )
+
+    def test_views_can_opt_out(self):
+        self.assertEqual(self.request(primary_view), "default")
+
+    def test_transactions_and_code_outside_requests_use_primary(self):
+        def read_in_transaction(request):
+            with transaction.atomic():
+                return read_db(request)
+
+        self.assertEqual(self.request(read_in_transaction), "default")
+        self.assertEqual(Book.objects.all().db, "default")
+
+    def test_api_reads_run_on_the_replica_within_budget(self):
+        user = get_user_model().objects.create_user(
+            email="replica@test.com", password="pass"
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZE=f"Bearer {AccessToken.for_user(user)}")
+
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = client.get(reverse("Borrowing:borrowing-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(replica_queries.captured_queries)
+
+    def test_catalog_cache_is_built_from_the_primary(self):
+        Book.objects.create(title="Dune", inventory=1, daily_fee=1)
+
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = APIClient().get(reverse("book-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertFalse(replica_queries.captured_queries)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_middleware_is_unused_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaRoutingMiddleware(read_db)
+
+
+def call_stripe(request):
+    with track("stripe"):
+        Book.objects.count()
+    return HttpResponse()
+
+
+@override_settings(
+    SERVER_TIMING_SAMPLE_RATE=1.0,
+    SERVER_TIMING_SLOW_MS=10_000,
+    SERVER_TIMING_TOP_QUERIES=2,
+)
+class ServerTimingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def metrics(self, response):
+        return {
+            metric.split(";")[0]: metric
+            for metric in response["Server-Timing"].split(", ")
+        }
+
+    def test_header_times_database_and_serializer(self):
+        Book.objects.create(title="Book", inventory=1, daily_fee=1)
+
+        with self.assertLogs("Library.timing", "INFO") as logs:
+            response = self.client.get(reverse("book-list"))
+
+        metrics = self.metrics(response)
+        self.assertEqual(set(metrics), {"db", "serializer", "total"})
+        self.assertRegex(metrics["db"], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertIn("path=/api/books/", logs.output[0])
+        self.assertEqual(logs.records[0].timing["status"], 200)
+
+    def test_outbound_calls_are_tracked(self):
+        response = ServerTimingMiddleware(call_stripe)(self.factory.get("/"))
+
+        self.assertIn("stripe", self.metrics(response))
+
+    def test_nested_segments_count_once(self):
+        def view(request):
+            with track("stripe"), track("stripe"):
+                pass
+            return HttpResponse()
+
+        with self.assertLogs("Library.timing", "INFO") as logs:
+            ServerTimingMiddleware(view)(self.factory.get("/"))
+
+        self.assertIn("stripe_ms", logs.records[0].timing)
+
+    @override_settings(SERVER_TIMING_SLOW_MS=0)
+    def test_slow_requests_log_the_slowest_queries(self):
+        with self.assertLogs("Library.timing", "WARNING") as logs:
+            ServerTimingMiddleware(call_stripe)(self.factory.get("/"))
+
+        self.assertIn("Slow request", logs.output[0])
+        self.assertIn('FROM "Book_book"', logs.output[0])
+        self.assertEqual(len(logs.records[0].timing["slowest_queries"]), 1)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_timed(self):
+        response = ServerTimingMiddleware(call_stripe)(self.factory.get("/"))
+
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_middleware_is_unused_when_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ServerTimingMiddleware(call_stripe)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(METRICS_TOKEN="")
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_requests_are_recorded_by_route(self):
+        labels = {"method": "GET", "route": "Borrowing:borrowing-list"}
+        before = sample("http_request_duration_seconds_count", status="401", **labels)
+        queries_before = sample("http_request_db_queries_count", **labels)
+
+        self.client.get(reverse("Borrowing:borrowing-list"))
+
+        self.assertEqual(
+            sample("http_request_duration_seconds_count", status="401", **labels),
+            before + 1,
+        )
+        self.assertEqual(
+            sample("http_request_db_queries_count", **labels), queries_before + 1
+        )
+
+    def test_unknown_methods_are_recorded_as_other(self):
+        labels = {"route": "unmatched", "status": "404"}
+        before = sample("http_request_duration_seconds_count", method="other", **labels)
+
+        self.client.generic("BREW", "/no-such-page/")
+
+        self.assertEqual(
+            sample("http_request_duration_seconds_count", method="other", **labels),
+            before + 1,
+        )
+        self.assertIsNone(
+            REGISTRY.get_sample_value(
+                "http_request_duration_seconds_count", {"method": "BREW", **labels}
+            )
+        )
+
+    def test_endpoint_exposes_metrics(self):
+        self.client.get(reverse("book-list"))
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            b'http_request_duration_seconds_count{method="GET",route="book-list"',
+            response.content,
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_endpoint_requires_token_when_set(self):
+        url = reverse("metrics")
+
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secreT")
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_catalog_cache_lookups_are_recorded(self):
+        miss = sample("cache_lookups_total", cache="catalog", result="miss")
+        hit = sample("cache_lookups_total", cache="catalog", result="hit")
+
+        self.client.get(reverse("book-list"))
+        self.client.get(reverse("book-list"))
+
+        self.assertEqual(
+            sample("cache_lookups_total", cache="catalog", result="miss"), miss + 1
+        )
+        self.assertEqual(
+            sample("cache_lookups_total", cache="catalog", result="hit"), hit + 1
+        )
+
+    def test_stripe_calls_are_recorded(self):
+        def fail():
+            raise ValueError
+
+        labels = {"service": "stripe", "operation": "test.fail"}
+        with self.assertRaises(ValueError):
+            stripe_client.call("test.fail", fail)
+
+        self.assertEqual(sample("external_call_duration_seconds_count", **labels), 1)
+        self.assertEqual(
+            sample("external_call_errors_total", error="ValueError", **labels), 1
+        )
+
+    def test_celery_tasks_are_recorded(self):
+        name = expire_old_payments.name
+        before = sample("celery_task_results_total", task=name, state="SUCCESS")
+
+        expire_old_payments.apply()
+
+        self.assertEqual(
+            sample("celery_task_results_total", task=name, state="SUCCESS"),
+            before + 1,
+        )
+        self.assertGreater(sample("celery_task_duration_seconds_count", task=name), 0)
+
+    def test_multiprocess_samples_are_collected_from_the_directory(self):
+        with tempfile.TemporaryDirectory() as directory, patch(
+            "Library.metrics.MULTIPROCESS", True
+        ), patch.dict("os.environ", {"PROMETHEUS_MULTIPROC_DIR": directory}):
+            response = metrics_view(RequestFactory().get("/metrics"))
+
+        # Nothing was written to the empty directory.
+        self.assertEqual(response.content, b"")
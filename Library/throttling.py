@@ -0,0 +1,151 @@
+import logging
+import math
+import threading
+import time
+
+import redis
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket, ARGV: capacity, refill rate (tokens per second).
+# Returns {allowed, seconds until the next token} in one round trip; the
+# clock is Redis' own, so app servers with skewed clocks agree.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+local allowed, wait = 0, 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class RedisTokenBucket:
+    def __init__(self, url):
+        # Short timeouts: a slow Redis must not stall every throttled request.
+        self.client = redis.Redis.from_url(
+            url, socket_connect_timeout=0.25, socket_timeout=0.25
+        )
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key, capacity, rate):
+        """Take a token; return ``(allowed, seconds to wait)``."""
+        allowed, wait = self.script(keys=[key], args=[capacity, rate])
+        return bool(allowed), float(wait)
+
+
+class LocalTokenBucket:
+    """In-process buckets for single-process development servers."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self.buckets[key] = (tokens, now)
+            return False, (1 - tokens) / rate
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+_buckets = {}
+
+
+def get_bucket():
+    backend = settings.THROTTLE_BACKEND
+    if backend not in _buckets:
+        if backend == "redis":
+            _buckets[backend] = RedisTokenBucket(settings.THROTTLE_REDIS_URL)
+        else:
+            _buckets[backend] = LocalTokenBucket()
+    return _buckets[backend]
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> ``(10, 10 / 60)``: burst capacity and tokens per second."""
+    count, period = rate.split("/")
+    seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+    return int(count), int(count) / seconds
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket throttle keyed by scope and client.
+
+    The view's ``throttle_scope`` is a scope name or a dict keyed by viewset
+    action; its rate comes from ``settings.THROTTLE_RATES``. Views, actions or
+    scopes without a rate are not throttled. If Redis is unreachable
+    requests are let through rather than failed.
+    """
+
+    def get_client(self, request):
+        raise NotImplementedError
+
+    def get_scope(self, view):
+        scope = getattr(view, "throttle_scope", None)
+        if isinstance(scope, dict):
+            return scope.get(getattr(view, "action", None))
+        return scope
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(view)
+        rate = settings.THROTTLE_RATES.get(scope) if scope else None
+        if rate is None:
+            return True
+
+        capacity, refill_rate = parse_rate(rate)
+        key = f"throttle:{scope}:{self.get_client(request)}"
+        try:
+            allowed, self.wait_seconds = get_bucket().take(key, capacity, refill_rate)
+        except redis.RedisError:
+            logger.warning(
+                "Throttle backend unavailable, not throttling", exc_info=True
+            )
+            return True
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds and math.ceil(self.wait_seconds)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Per user; anonymous requests are keyed by IP."""
+
+    def get_client(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Per client IP, for endpoints used before logging in."""
+
+    def get_client(self, request):
+        return f"ip:{self.get_ident(request)}"
@@ -0,0 +1,153 @@
+import heapq
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# The RequestTiming of the current sampled request, None otherwise.
+_current = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """Time spent per segment ("db", "serializer", "stripe", ...) of a request."""
+
+    def __init__(self, top_queries):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.query_count = 0
+        self.top_queries = top_queries
+        # Min-heap of (duration, sql) holding the slowest top_queries.
+        self.slowest = []
+        self.active = set()
+
+    def add(self, name, duration):
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.add("db", duration)
+            self.query_count += 1
+            if self.top_queries:
+                entry = (duration, sql)
+                if len(self.slowest) < self.top_queries:
+                    heapq.heappush(self.slowest, entry)
+                else:
+                    heapq.heappushpop(self.slowest, entry)
+
+    def header(self, total):
+        db = self.durations.get("db", 0.0) * 1000
+        metrics = [f'db;dur={db:.1f};desc="{self.query_count} queries"']
+        metrics += [
+            f"{name};dur={duration * 1000:.1f}"
+            for name, duration in self.durations.items()
+            if name != "db"
+        ]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+@contextmanager
+def track(name):
+    """
+    Add the time spent in the block to segment ``name`` of the current request.
+
+    A no-op outside sampled requests. Nested blocks of the same segment are
+    counted once.
+    """
+    timing = _current.get()
+    if timing is None or name in timing.active:
+        yield
+        return
+
+    timing.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+        timing.active.discard(name)
+
+
+class TimedSerializerMixin:
+    """Count ``to_representation`` towards the "serializer" segment."""
+
+    def to_representation(self, instance):
+        if _current.get() is None:
+            return super().to_representation(instance)
+        with track("serializer"):
+            return super().to_representation(instance)
+
+
+class ServerTimingMiddleware:
+    """
+    Time sampled requests and report it in a ``Server-Timing`` header and a
+    log line.
+
+    ``SERVER_TIMING_SAMPLE_RATE`` of the requests are timed: total, SQL count
+    and time on every connection, serialization and outbound calls wrapped in
+    ``track()``. Requests slower than ``SERVER_TIMING_SLOW_MS`` are logged as
+    warnings with their ``SERVER_TIMING_TOP_QUERIES`` slowest statements.
+    Unused unless ``SERVER_TIMING_ENABLED``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timing = RequestTiming(settings.SERVER_TIMING_TOP_QUERIES)
+        token = _current.set(timing)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total = time.perf_counter() - timing.started
+        response["Server-Timing"] = timing.header(total)
+        self.log(request, response, timing, total)
+        return response
+
+    def log(self, request, response, timing, total):
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 1),
+            "queries": timing.query_count,
+            **{
+                f"{name}_ms": round(duration * 1000, 1)
+                for name, duration in timing.durations.items()
+            },
+        }
+        message = " ".join(f"{key}={value}" for key, value in fields.items())
+
+        if total * 1000 < settings.SERVER_TIMING_SLOW_MS:
+            logger.info(message, extra={"timing": fields})
+            return
+
+        slowest = sorted(timing.slowest, reverse=True)
+        fields["slowest_queries"] = [
+            {"ms": round(duration * 1000, 1), "sql": sql} for duration, sql in slowest
+        ]
+        lines = [f"  {duration * 1000:.1f}ms {sql}" for duration, sql in slowest]
+        logger.warning(
+            "\n".join([f"Slow request {message}", *lines]), extra={"timing": fields}
+        )
@@ -23,12 +23,19 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from Library.metrics import metrics_view
+from Library.views import DatabasePoolStatsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("Book.urls")),
     path("api/user/", include("User.urls")),
     path("api/", include("Borrowing.urls", "Borrowing")),
     path("api/", include("Payment.urls")),
+    path(
+        "api/health/db-pool/", DatabasePoolStatsView.as_view(), name="db-pool-stats"
+    ),
+    path("metrics", metrics_view, name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
     path(
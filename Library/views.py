@@ -0,0 +1,19 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from Library.db import pool_stats
+
+
+class DatabasePoolStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        responses={200: OpenApiTypes.OBJECT},
+        description="Connection pool counters of the process serving the request, "
+        "per database (null without a pool). Only admins.",
+    )
+    def get(self, request):
+        return Response(pool_stats())
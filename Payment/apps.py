@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PaymentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "Payment"
+
+    def ready(self):
+        from Payment import signals, stripe_client  # noqa: F401
+
+        stripe_client.configure()
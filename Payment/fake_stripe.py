@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+SESSIONS_PATH = "/v1/checkout/sessions"
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API.
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        if self.path != SESSIONS_PATH:
+            return self.respond(404, error("invalid_request_error", "Not found"))
+        if self.server.before_request(self):
+            return
+
+        params = dict(parse_qsl(body))
+        session = self.server.add_session(
+            mode=params.get("mode", "payment"),
+            expires_at=params.get("expires_at"),
+            metadata={
+                key[len("metadata[") : -1]: value
+                for key, value in params.items()
+                if key.startswith("metadata[")
+            },
+        )
+        self.respond(200, session)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == SESSIONS_PATH:
+            if self.server.before_request(self):
+                return
+            return self.respond(
+                200, self.server.list_sessions(dict(parse_qsl(url.query)))
+            )
+
+        if not url.path.startswith(SESSIONS_PATH + "/"):
+            return self.respond(404, error("invalid_request_error", "Not found"))
+        if self.server.before_request(self):
+            return
+
+        session_id = url.path.rpartition("/")[2]
+        session = self.server.sessions.get(session_id)
+        if session is None:
+            return self.respond(
+                404,
+                error(
+                    "invalid_request_error", f"No such checkout.session: {session_id}"
+                ),
+            )
+        self.respond(200, session)
+
+    def respond(self, status, data):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Request-Id", f"req_{uuid.uuid4().hex[:14]}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def error(error_type, message):
+    return {"error": {"type": error_type, "message": message}}
+
+
+class FakeStripeServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the Checkout Sessions part of the Stripe API.
+
+    Set ``STRIPE_API_BASE`` to its ``url``. ``latency`` adds a delay to every
+    API call and ``fail_status`` makes them fail, to simulate an incident.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_status=None):
+        super().__init__((host, port), FakeStripeHandler)
+        self.latency = latency
+        self.fail_status = fail_status
+        self.sessions = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def before_request(self, handler):
+        """Count, delay or fail a request. Returns whether it was answered."""
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_status:
+            handler.respond(
+                self.fail_status, error("api_error", "Simulated Stripe outage")
+            )
+            return True
+        return False
+
+    def add_session(self, **fields):
+        """Store a session, newest last, as the API would have created it."""
+        session_id = fields.pop("id", None) or f"cs_test_{uuid.uuid4().hex}"
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "created": int(time.time()),
+            "url": f"{self.url}/c/pay/{session_id}",
+            "mode": "payment",
+            "payment_status": "unpaid",
+            "status": "open",
+            "expires_at": None,
+            "metadata": {},
+            **fields,
+        }
+        with self.lock:
+            self.sessions[session_id] = session
+        return session
+
+    def list_sessions(self, params):
+        """``GET /v1/checkout/sessions``: newest first, cursor paginated."""
+        with self.lock:
+            sessions = list(reversed(self.sessions.values()))
+
+        if "created[gte]" in params:
+            sessions = [
+                s for s in sessions if s["created"] >= int(params["created[gte]"])
+            ]
+        if "created[lt]" in params:
+            sessions = [
+                s for s in sessions if s["created"] < int(params["created[lt]"])
+            ]
+        if "starting_after" in params:
+            ids = [session["id"] for session in sessions]
+            sessions = sessions[ids.index(params["starting_after"]) + 1 :]
+
+        limit = int(params.get("limit", 10))
+        return {
+            "object": "list",
+            "url": SESSIONS_PATH,
+            "data": sessions[:limit],
+            "has_more": len(sessions) > limit,
+        }
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,161 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Payment.models import Payment
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset and report query plans and latency for the "
+        "hot Borrowing/Payment queries with and without their indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Number of borrowings (each with one payment) to create first, "
+            "e.g. 10000000.",
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.seed(options["seed"], options["batch_size"])
+
+        # Give the planner fresh statistics, as autovacuum would in production.
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        self.repeat = options["repeat"]
+        self.probe = self.pick_probe_values()
+        if self.probe is None:
+            self.stderr.write("No payments found, run with --seed first.")
+            return
+
+        # SQLite only allows schema changes in a transaction with FK checks off.
+        connection.disable_constraint_checking()
+        try:
+            with transaction.atomic():
+                self.drop_indexes()
+                self.report("before (indexes dropped)")
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            connection.enable_constraint_checking()
+
+        self.report("after")
+
+    def seed(self, rows, batch_size):
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            User(email=f"bench{index}@example.com", password="!")
+            for index in range(max(rows // 100, 1))
+        )
+        books = Book.objects.bulk_create(
+            Book(title=f"Book {index}", author="Bench", inventory=10**6, daily_fee=1)
+            for index in range(1000)
+        )
+        now = timezone.now()
+        statuses = ["PAID"] * 8 + ["EXPIRED", "PENDING"]
+
+        for start in range(0, rows, batch_size):
+            size = min(batch_size, rows - start)
+            borrowings = Borrowing.objects.bulk_create(
+                Borrowing(
+                    user=users[(start + index) % len(users)],
+                    book=books[(start + index) % len(books)],
+                    expected_return_date=date.today() + timedelta(days=7),
+                    actual_return_date=(
+                        None if (start + index) % 10 == 0 else date.today()
+                    ),
+                )
+                for index in range(size)
+            )
+            Payment.objects.bulk_create(
+                Payment(
+                    borrowing=borrowing,
+                    status=statuses[(start + index) % len(statuses)],
+                    money_to_pay=7,
+                    session_id=f"cs_bench_{start + index}",
+                    created_at=now - timedelta(minutes=start + index),
+                )
+                for index, borrowing in enumerate(borrowings)
+            )
+            self.stdout.write(f"Seeded {start + size}/{rows} rows")
+
+    def pick_probe_values(self):
+        payment = Payment.objects.select_related("borrowing").order_by("id").last()
+        if payment is None:
+            return None
+        return {
+            "user_id": payment.borrowing.user_id,
+            "session_id": payment.session_id,
+            "cutoff": timezone.now() - timedelta(hours=1),
+        }
+
+    def hot_queries(self):
+        probe = self.probe
+        return {
+            "unresolved payments (borrow validation)": Borrowing.objects.filter(
+                user_id=probe["user_id"],
+                payments__status__in=["PENDING", "EXPIRED"],
+            ).values("id")[:1],
+            "active borrowings of a user": Borrowing.objects.filter(
+                user_id=probe["user_id"], actual_return_date__isnull=True
+            ).values("id", "book_id"),
+            "pending payments to expire": Payment.objects.filter(
+                status="PENDING", created_at__lt=probe["cutoff"]
+            )
+            .order_by("created_at")
+            .values_list("id", flat=True)[:1000],
+            "payment by session_id": Payment.objects.filter(
+                session_id=probe["session_id"]
+            ).values("id"),
+        }
+
+    def drop_indexes(self):
+        with connection.schema_editor(atomic=False) as schema_editor:
+            # First, as SQLite rebuilds the table (and its Meta indexes) here.
+            unique_field = Payment._meta.get_field("session_id")
+            plain_field = unique_field.clone()
+            plain_field.set_attributes_from_name("session_id")
+            plain_field.model = Payment
+            plain_field._unique = False
+            schema_editor.alter_field(Payment, unique_field, plain_field)
+
+            for model in (Borrowing, Payment):
+                for index in model._meta.indexes:
+                    schema_editor.remove_index(model, index)
+
+    def report(self, label):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label} =="))
+        for name, queryset in self.hot_queries().items():
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(self.style.SUCCESS(f"\n-- {name}"))
+            self.stdout.write(queryset.explain())
+            self.stdout.write(
+                f"median {statistics.median(timings):.2f} ms, "
+                f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:.2f} ms "
+                f"over {self.repeat} runs"
+            )
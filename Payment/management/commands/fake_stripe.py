@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from Payment.fake_stripe import FakeStripeServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local fake of the Stripe Checkout Sessions API. Point the app at "
+        "it with STRIPE_API_BASE for offline benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=12111)
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="Seconds added to each call."
+        )
+        parser.add_argument(
+            "--fail-status",
+            type=int,
+            default=None,
+            help="Answer every call with this HTTP status, e.g. 503.",
+        )
+
+    def handle(self, *args, **options):
+        server = FakeStripeServer(
+            options["host"],
+            options["port"],
+            latency=options["latency"],
+            fail_status=options["fail_status"],
+        )
+        self.stdout.write(f"Fake Stripe listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
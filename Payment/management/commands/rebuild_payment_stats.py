@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Payment.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the PaymentDailyStat rollup from the payments. Run once after "
+        "deploying the rollup to backfill existing payments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Only check the last N days. Defaults to every day with payments.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"]:
+            today = timezone.localdate()
+            corrected = rebuild_daily_stats(
+                today - timedelta(days=options["days"]), today
+            )
+        else:
+            corrected = rebuild_daily_stats()
+        self.stdout.write(f"Corrected {corrected} daily stat row(s)")
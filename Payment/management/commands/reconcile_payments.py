@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from Payment.models import ReconciliationRun
+from Payment.reconciliation import claim, format_report, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Stripe Checkout Sessions created in a time window with their "
+        "payments, fix drifted statuses and print a report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=48,
+            help="Check sessions created in the last N hours.",
+        )
+        parser.add_argument(
+            "--since", help="Window start (ISO 8601), instead of --hours."
+        )
+        parser.add_argument("--until", help="Window end (ISO 8601). Defaults to now.")
+        parser.add_argument(
+            "--resume", type=int, help="Continue an unfinished run by its id."
+        )
+        parser.add_argument("--page-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            run = ReconciliationRun.objects.filter(pk=options["resume"]).first()
+            if run is None:
+                raise CommandError(f"No reconciliation run {options['resume']}.")
+            if run.status == ReconciliationRun.Status.COMPLETED:
+                raise CommandError(f"Run {run.pk} is already completed.")
+            if not claim(run):
+                raise CommandError(f"Run {run.pk} is running in another process.")
+        else:
+            window_end = self.parse(options["until"]) or timezone.now()
+            window_start = self.parse(options["since"]) or window_end - timedelta(
+                hours=options["hours"]
+            )
+            run = ReconciliationRun.objects.create(
+                window_start=window_start, window_end=window_end
+            )
+
+        try:
+            reconcile(run, options["page_size"])
+        finally:
+            self.stdout.write(format_report(run))
+            if run.status == ReconciliationRun.Status.FAILED:
+                self.stderr.write(f"Resume with: reconcile_payments --resume {run.pk}")
+
+    def parse(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None and parse_date(value):
+            parsed = datetime.combine(parse_date(value), datetime.min.time())
+        if parsed is None:
+            raise CommandError(f"Invalid date: {value}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
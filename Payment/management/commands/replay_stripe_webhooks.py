@@ -0,0 +1,108 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Payment.webhooks import sign_payload
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / "webhook_fixtures"
+
+
+class Command(BaseCommand):
+    help = (
+        "Sign recorded Stripe webhook events and POST them to the webhook "
+        "endpoint, to exercise or load-test it without Stripe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "fixtures",
+            nargs="*",
+            help=f"Event JSON files to send. Defaults to every file in {FIXTURES_DIR}.",
+        )
+        parser.add_argument(
+            "--url", default="http://localhost:8000/api/webhook/stripe/"
+        )
+        parser.add_argument(
+            "--secret",
+            default=None,
+            help="Signing secret. Defaults to settings.STRIPE_WEBHOOK_SECRET.",
+        )
+        parser.add_argument(
+            "--session-id",
+            default=None,
+            help="Replace the Checkout Session id in every event.",
+        )
+        parser.add_argument("--count", type=int, default=1)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--unique-event-ids",
+            action="store_true",
+            help="Give every delivery a new event id. By default events keep "
+            "their id, so repeats exercise duplicate delivery.",
+        )
+
+    def handle(self, *args, **options):
+        secret = options["secret"] or settings.STRIPE_WEBHOOK_SECRET
+        if not secret:
+            raise CommandError("Set STRIPE_WEBHOOK_SECRET or pass --secret.")
+
+        paths = [Path(path) for path in options["fixtures"]] or sorted(
+            FIXTURES_DIR.glob("*.json")
+        )
+        events = [json.loads(path.read_text()) for path in paths]
+        if not events:
+            raise CommandError("No events to send.")
+        if options["session_id"]:
+            for event in events:
+                event["data"]["object"]["id"] = options["session_id"]
+
+        deliveries = [event for _ in range(options["count"]) for event in events]
+        local = threading.local()
+
+        def deliver(event):
+            if options["unique_event_ids"]:
+                event = {**event, "id": f"evt_replay_{uuid.uuid4().hex}"}
+            payload = json.dumps(event)
+
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+            started = time.perf_counter()
+            response = local.session.post(
+                options["url"],
+                data=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "Stripe-Signature": sign_payload(payload, secret),
+                },
+                timeout=30,
+            )
+            return response.status_code, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(executor.map(deliver, deliveries))
+        elapsed = time.perf_counter() - started
+
+        timings = sorted(timing for _, timing in results)
+        statuses = Counter(status_code for status_code, _ in results)
+        self.stdout.write(
+            f"Sent {len(results)} event(s) in {elapsed:.2f} s "
+            f"({len(results) / elapsed:.1f}/s)"
+        )
+        self.stdout.write(
+            "Statuses: "
+            + ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items()))
+        )
+        self.stdout.write(
+            f"Latency median {statistics.median(timings):.2f} ms, "
+            f"p95 {timings[max(int(len(timings) * 0.95) - 1, 0)]:.2f} ms"
+        )
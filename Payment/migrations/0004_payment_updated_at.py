@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Payment", "0003_alter_payment_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:15
+
+from django.db import migrations, models
+from django.db.models import Case, Count, When
+
+
+def blank_session_ids_to_null(apps, schema_editor):
+    # Only real Stripe session ids may take part in the unique index.
+    Payment = apps.get_model("Payment", "Payment")
+    Payment.objects.filter(session_id="").update(session_id=None)
+
+    # A session id shared by several payments stays with the paid one, or
+    # else the oldest; the others lose it so the unique index can be built.
+    duplicated = list(
+        Payment.objects.exclude(session_id=None)
+        .values("session_id")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+        .values_list("session_id", flat=True)
+    )
+    for session_id in duplicated:
+        payments = Payment.objects.filter(session_id=session_id)
+        keep = payments.order_by(
+            Case(When(status="PAID", then=0), default=1), "id"
+        ).first()
+        payments.exclude(pk=keep.pk).update(session_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Payment", "0005_payment_session_pending"),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_session_ids_to_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="payment",
+            name="session_id",
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["status", "created_at"], name="payment_status_created_idx"
+            ),
+        ),
+    ]
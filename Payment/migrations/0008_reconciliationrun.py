@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Payment", "0007_processedstripeevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReconciliationRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("window_start", models.DateTimeField()),
+                ("window_end", models.DateTimeField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RUNNING", "Running"),
+                            ("COMPLETED", "Completed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="RUNNING",
+                        max_length=20,
+                    ),
+                ),
+                ("cursor", models.CharField(blank=True, max_length=255)),
+                ("pages", models.PositiveIntegerField(default=0)),
+                ("sessions_seen", models.PositiveIntegerField(default=0)),
+                ("payments_fixed", models.PositiveIntegerField(default=0)),
+                ("unmatched_sessions", models.PositiveIntegerField(default=0)),
+                ("report", models.JSONField(blank=True, default=list)),
+                ("error", models.TextField(blank=True)),
+                ("started_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
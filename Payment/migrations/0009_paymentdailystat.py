@@ -0,0 +1,60 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Payment", "0008_reconciliationrun"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentDailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[("PAYMENT", "Payment"), ("FINE", "Fine")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PAID", "Paid"),
+                            ("EXPIRED", "Expired"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "ordering": ["day", "type", "status"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "type", "status"),
+                        name="payment_daily_stat_unique",
+                    )
+                ],
+            },
+        ),
+    ]
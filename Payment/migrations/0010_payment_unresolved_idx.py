@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Borrowing", "0006_telegrammessage"),
+        ("Payment", "0009_paymentdailystat"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                condition=models.Q(("status__in", ["PENDING", "EXPIRED"])),
+                fields=["borrowing"],
+                name="payment_unresolved_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Payment", "0010_payment_unresolved_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reconciliationrun",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -28,13 +28,117 @@ class Payment(models.Model):
     borrowing = models.ForeignKey(
         Borrowing, on_delete=models.CASCADE, related_name="payments"
     )
-    session_url = models.URLField()
-    session_id = models.CharField(max_length=255)
+    # Empty until the Stripe Checkout Session is created after commit.
+    session_url = models.URLField(blank=True)
+    session_id = models.CharField(max_length=255, null=True, blank=True, unique=True)
     money_to_pay = models.DecimalField(max_digits=7, decimal_places=2)
     created_at = models.DateTimeField(default=now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Fields the daily rollup is keyed on, as last loaded or saved; lets the
+    # save signals move the payment between buckets without a SELECT.
+    ROLLUP_FIELDS = ("created_at", "type", "status", "money_to_pay")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rollup_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_rollup_state()
+
+    def remember_rollup_state(self):
+        deferred = self.get_deferred_fields()
+        if deferred.intersection(self.ROLLUP_FIELDS):
+            self._rollup_state = None
+        else:
+            self._rollup_state = tuple(
+                getattr(self, field) for field in self.ROLLUP_FIELDS
+            )
 
     def __str__(self):
         return f"{self.type} for {self.borrowing.user.email} - {self.status}"
 
     class Meta:
         ordering = ["-id"]
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"], name="payment_status_created_idx"
+            ),
+            # The unresolved payments check of every new borrowing.
+            models.Index(
+                fields=["borrowing"],
+                condition=models.Q(status__in=["PENDING", "EXPIRED"]),
+                name="payment_unresolved_idx",
+            ),
+        ]
+
+
+class ProcessedStripeEvent(models.Model):
+    """Stripe webhook events already applied, so redeliveries are no-ops."""
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    processed_at = models.DateTimeField(default=now)
+
+    def __str__(self):
+        return f"{self.type} {self.event_id}"
+
+
+class ReconciliationRun(models.Model):
+    """A pass over Stripe Checkout Sessions created in a time window."""
+
+    class Status(models.TextChoices):
+        RUNNING = "RUNNING"
+        COMPLETED = "COMPLETED"
+        FAILED = "FAILED"
+
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.RUNNING
+    )
+    # Last Stripe session handled; a resumed run continues after it.
+    cursor = models.CharField(max_length=255, blank=True)
+    pages = models.PositiveIntegerField(default=0)
+    sessions_seen = models.PositiveIntegerField(default=0)
+    payments_fixed = models.PositiveIntegerField(default=0)
+    unmatched_sessions = models.PositiveIntegerField(default=0)
+    # The first fixes and unmatched sessions, capped to keep the row small.
+    report = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(default=now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Saved with every page, so a RUNNING run whose worker died goes stale.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Reconciliation {self.window_start:%Y-%m-%d %H:%M} - {self.status}"
+
+
+class PaymentDailyStat(models.Model):
+    """
+    Count and amount of payments per creation day, type and status.
+
+    Kept in step by Payment.stats on every status change and rebuilt nightly;
+    reports read these rows instead of the payment table.
+    """
+
+    day = models.DateField()
+    type = models.CharField(max_length=20, choices=Payment.Type.choices)
+    status = models.CharField(max_length=20, choices=Payment.Status.choices)
+    count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["day", "type", "status"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "type", "status"], name="payment_daily_stat_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.type} {self.status}: {self.count}"
@@ -0,0 +1,200 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from Payment import stripe_client
+from Payment.models import Payment, ReconciliationRun
+from Payment.services import notify_payment_paid
+from Payment.stats import apply_changes, bucket
+
+MAX_REPORTED = 1000
+CLAIM_LOCK_KEY = "payment:reconciliation:claim"
+
+
+def expected_status(session, current):
+    """The status Stripe says a payment should have, or None if it is fine."""
+    if session["payment_status"] in ("paid", "no_payment_required"):
+        return Payment.Status.PAID
+    if session["status"] == "expired" and current == Payment.Status.PENDING:
+        return Payment.Status.EXPIRED
+    return None
+
+
+def reconcile_page(run, sessions):
+    """
+    Fix the payments of one page of sessions and advance the checkpoint.
+
+    One locked bulk lookup and one ``bulk_update`` per page; the checkpoint
+    and the daily rollup are updated in the same transaction, so a resumed
+    run never redoes a page.
+    """
+    with transaction.atomic():
+        payments = {
+            payment.session_id: payment
+            for payment in Payment.objects.select_for_update().filter(
+                session_id__in=[session["id"] for session in sessions]
+            )
+        }
+
+        now = timezone.now()
+        fixed, entries, changes = [], [], []
+        for session in sessions:
+            payment = payments.get(session["id"])
+            if payment is None:
+                run.unmatched_sessions += 1
+                entries.append({"session_id": session["id"], "issue": "no payment"})
+                continue
+
+            status = expected_status(session, payment.status)
+            if status is None or status == payment.status:
+                continue
+
+            entries.append(
+                {
+                    "session_id": session["id"],
+                    "payment_id": payment.pk,
+                    "from": payment.status,
+                    "to": status,
+                }
+            )
+            amount = payment.money_to_pay
+            changes.append(
+                (
+                    (bucket(payment.created_at, payment.type, payment.status), amount),
+                    (bucket(payment.created_at, payment.type, status), amount),
+                )
+            )
+            payment.status = status
+            payment.updated_at = now
+            fixed.append(payment)
+
+        Payment.objects.bulk_update(fixed, ["status", "updated_at"])
+        apply_changes(changes)
+        # Same notification as a payment confirmed by the success page or
+        # the webhook.
+        for payment in Payment.objects.select_related(
+            "borrowing__user", "borrowing__book"
+        ).filter(pk__in=[p.pk for p in fixed if p.status == Payment.Status.PAID]):
+            notify_payment_paid(payment)
+
+        run.cursor = sessions[-1]["id"]
+        run.pages += 1
+        run.sessions_seen += len(sessions)
+        run.payments_fixed += len(fixed)
+        if len(run.report) < MAX_REPORTED:
+            run.report = (run.report + entries)[:MAX_REPORTED]
+        run.save()
+
+
+def claim_run(hours):
+    """
+    Claim the run the next reconciliation should do, or return None while
+    another worker is still running one.
+
+    A FAILED run, or a RUNNING one whose worker stopped saving progress
+    ``RECONCILIATION_STALE_AFTER`` seconds ago, is resumed; otherwise a new
+    run covers the last ``hours``.
+    """
+    if not cache.add(CLAIM_LOCK_KEY, 1, timeout=60):
+        return None
+
+    try:
+        unfinished = ReconciliationRun.objects.exclude(
+            status=ReconciliationRun.Status.COMPLETED
+        )
+        if unfinished.filter(_live()).exists():
+            return None
+
+        run = unfinished.order_by("-started_at").first()
+        if run is None:
+            window_end = timezone.now()
+            return ReconciliationRun.objects.create(
+                window_start=window_end - timedelta(hours=hours),
+                window_end=window_end,
+            )
+        return run if claim(run) else None
+    finally:
+        cache.delete(CLAIM_LOCK_KEY)
+
+
+def claim(run):
+    """Mark an unfinished ``run`` RUNNING, unless a live worker has it."""
+    claimed = (
+        ReconciliationRun.objects.filter(pk=run.pk)
+        .exclude(status=ReconciliationRun.Status.COMPLETED)
+        .exclude(_live())
+        .update(status=ReconciliationRun.Status.RUNNING, updated_at=timezone.now())
+    )
+    if claimed:
+        run.refresh_from_db()
+    return bool(claimed)
+
+
+def _live():
+    stale = timezone.now() - timedelta(seconds=settings.RECONCILIATION_STALE_AFTER)
+    return Q(status=ReconciliationRun.Status.RUNNING, updated_at__gte=stale)
+
+
+def reconcile(run, page_size=100):
+    """
+    Page through the Stripe sessions of ``run``'s window and fix drifted payments.
+
+    Only one page is held in memory at a time. If it fails, calling it again
+    with the same run resumes after the last completed page; ``claim`` it
+    first so two workers never share it.
+    """
+    params = {
+        "limit": page_size,
+        "created": {
+            "gte": int(run.window_start.timestamp()),
+            "lt": int(run.window_end.timestamp()),
+        },
+    }
+    run.status = ReconciliationRun.Status.RUNNING
+    run.error = ""
+    run.save(update_fields=["status", "error"])
+
+    try:
+        while True:
+            if run.cursor:
+                params["starting_after"] = run.cursor
+            page = stripe_client.list_checkout_sessions(**params)
+            if page["data"]:
+                reconcile_page(run, page["data"])
+            if not page["has_more"]:
+                break
+    except Exception as error:
+        run.status = ReconciliationRun.Status.FAILED
+        run.error = repr(error)
+        run.save(update_fields=["status", "error"])
+        raise
+
+    run.status = ReconciliationRun.Status.COMPLETED
+    run.finished_at = timezone.now()
+    run.save(update_fields=["status", "finished_at"])
+    return run
+
+
+def format_report(run):
+    lines = [
+        f"Reconciliation run {run.pk}: {run.window_start:%Y-%m-%d %H:%M} to "
+        f"{run.window_end:%Y-%m-%d %H:%M} ({run.status})",
+        f"Pages: {run.pages}, sessions: {run.sessions_seen}, "
+        f"payments fixed: {run.payments_fixed}, "
+        f"sessions without payment: {run.unmatched_sessions}",
+    ]
+    for entry in run.report:
+        if "payment_id" in entry:
+            lines.append(
+                f"  payment {entry['payment_id']} ({entry['session_id']}): "
+                f"{entry['from']} -> {entry['to']}"
+            )
+        else:
+            lines.append(f"  {entry['session_id']}: {entry['issue']}")
+    if run.error:
+        lines.append(f"Error: {run.error}")
+    return "\n".join(lines)
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 
 
-from Payment.models import Payment
+from Library.timing import TimedSerializerMixin
+from Payment.models import Payment, PaymentDailyStat
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = [
@@ -25,3 +26,23 @@ class PaymentDetailSerializer(PaymentSerializer):
 
         from Borrowing.serializers import BorrowingSerializer
         self.fields["borrowing"] = BorrowingSerializer(read_only=True)
+
+
+class PaymentDailyStatSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = PaymentDailyStat
+        fields = ["day", "type", "status", "count", "amount"]
+
+
+class PaymentStatsQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    type = serializers.ChoiceField(choices=Payment.Type.choices, required=False)
+    status = serializers.ChoiceField(choices=Payment.Status.choices, required=False)
+
+
+class PaymentStatsTotalSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    status = serializers.CharField()
+    count = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2)
@@ -1,9 +1,19 @@
+import logging
+from datetime import timedelta
+
 import stripe
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework.reverse import reverse
 
+from Borrowing.telegram_send import send_telegram_message
+from Payment import stripe_client
+from Payment.models import Payment
+from Payment.stats import update_payment_status
+
+logger = logging.getLogger(__name__)
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
 
 def create_stripe_session(
     borrowing,
@@ -13,13 +23,21 @@ def create_stripe_session(
     cancel_url=None,
     description="",
     payment_type="PAYMENT",
+    idempotency_key=None,
+    expires_at=None,
 ):
     if not success_url:
         success_url = request.build_absolute_uri(reverse("Payment:payment-success"))
     if not cancel_url:
         cancel_url = request.build_absolute_uri(reverse("Payment:payment-cancel"))
 
-    session = stripe.checkout.Session.create(
+    options = {}
+    if idempotency_key:
+        options["idempotency_key"] = idempotency_key
+    if expires_at:
+        options["expires_at"] = int(expires_at.timestamp())
+
+    session = stripe_client.create_checkout_session(
         payment_method_types=["card"],
         line_items=[
             {
@@ -38,6 +56,162 @@ def create_stripe_session(
         success_url=success_url,
         cancel_url=cancel_url,
         metadata={"borrowing_id": str(borrowing.id), "type": payment_type},
+        **options,
     )
 
     return session.url, session.id
+
+
+def checkout_idempotency_key(payment):
+    """
+    Stripe idempotency key for the payment's Checkout Session.
+
+    Retries for the same payment get the session created first; a payment
+    turned into a fine of another amount gets a new one.
+    """
+    return f"checkout:payment-{payment.pk}:{payment.type}:{payment.money_to_pay}"
+
+
+def attach_stripe_session(payment, success_url, cancel_url, description):
+    """
+    Create the Checkout Session for a committed payment and store it.
+
+    The session expires ``PAYMENT_SESSION_TTL`` seconds after the payment was
+    created, and the payment is scheduled to expire at the same moment.
+    """
+    # Anchored on the payment only, so a retry sends the same parameters
+    # under the same idempotency key; the sweep in expire_stale_payments uses
+    # the same TTL.
+    expires_at = payment.created_at + timedelta(seconds=settings.PAYMENT_SESSION_TTL)
+    session_url, session_id = create_stripe_session(
+        payment.borrowing,
+        request=None,
+        amount=payment.money_to_pay,
+        success_url=success_url,
+        cancel_url=cancel_url,
+        description=description,
+        payment_type=payment.type,
+        idempotency_key=checkout_idempotency_key(payment),
+        expires_at=expires_at,
+    )
+
+    updated = Payment.objects.filter(pk=payment.pk, session_id__isnull=True).update(
+        session_url=session_url, session_id=session_id, updated_at=timezone.now()
+    )
+    payment.session_url = session_url
+    payment.session_id = session_id
+    if updated:
+        schedule_payment_expiry(session_id, expires_at)
+
+
+def schedule_payment_expiry(session_id, expires_at):
+    from Payment.tasks import expire_payment
+
+    try:
+        expire_payment.apply_async((session_id,), eta=expires_at)
+    except Exception:
+        # The periodic sweep expires it instead.
+        logger.exception("Could not schedule expiry of session %s", session_id)
+
+
+def schedule_stripe_session(payment, request, description):
+    """
+    Create the payment's Checkout Session once the current transaction commits.
+
+    Keeps the Stripe round-trip out of the transaction, so no row lock or
+    connection is held while waiting on the network. The session is created
+    inline right after commit so the client normally gets the URL in the same
+    response; if Stripe fails, a Celery task retries it and the URL shows up
+    on the payment resource later.
+    """
+    success_url = request.build_absolute_uri(reverse("Payment:payment-success"))
+    cancel_url = request.build_absolute_uri(reverse("Payment:payment-cancel"))
+
+    def create_session():
+        try:
+            attach_stripe_session(payment, success_url, cancel_url, description)
+        except stripe.error.StripeError:
+            logger.warning(
+                "Stripe session for payment %s failed, retrying in background",
+                payment.pk,
+                exc_info=True,
+            )
+            from Payment.tasks import create_payment_session
+
+            try:
+                create_payment_session.delay(
+                    payment.pk, success_url, cancel_url, description
+                )
+            except Exception:
+                logger.exception(
+                    "Could not queue Stripe session for payment %s", payment.pk
+                )
+
+    transaction.on_commit(create_session)
+
+
+def mark_payment_paid(session_id):
+    """
+    Mark the payment of a paid Checkout Session as PAID.
+
+    Idempotent and safe under concurrent callers: only the call that actually
+    changes the row gets the payment back and queues the admin notification.
+    """
+    updated = update_payment_status(
+        Payment.objects.filter(session_id=session_id), Payment.Status.PAID
+    )
+    if not updated:
+        return None
+
+    payment = Payment.objects.select_related("borrowing__user", "borrowing__book").get(
+        session_id=session_id
+    )
+    notify_payment_paid(payment)
+    return payment
+
+
+def notify_payment_paid(payment):
+    """Queue the admin notification; needs ``borrowing__user`` and ``__book``."""
+    send_telegram_message(
+        f"✅ Оплата прошла успешно\n"
+        f"👤 {payment.borrowing.user.email}\n"
+        f"📘 {payment.borrowing.book.title}\n"
+        f"💰 ${payment.money_to_pay} ({payment.type})"
+    )
+
+
+def mark_payment_expired(session_id):
+    """Mark the still pending payment of an expired Checkout Session as EXPIRED."""
+    return update_payment_status(
+        Payment.objects.filter(session_id=session_id, status=Payment.Status.PENDING),
+        Payment.Status.EXPIRED,
+    )
+
+
+def expire_stale_payments(cutoff, batch_size=500):
+    """
+    Expire payments still PENDING that were created before ``cutoff``.
+
+    Works through the (status, created_at) index in batches of
+    ``batch_size``, each its own short UPDATE, so locks are only held on a
+    few rows at a time. Returns ``(expired, batches)``.
+    """
+    expired = batches = 0
+    while True:
+        ids = list(
+            Payment.objects.filter(status=Payment.Status.PENDING, created_at__lt=cutoff)
+            .order_by("created_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        expired += update_payment_status(
+            Payment.objects.filter(id__in=ids, status=Payment.Status.PENDING),
+            Payment.Status.EXPIRED,
+        )
+        batches += 1
+        if len(ids) < batch_size:
+            break
+
+    return expired, batches
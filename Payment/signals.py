@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from Payment.models import Payment
+from Payment.stats import apply_changes, bucket
+
+
+def rollup_state(created_at, payment_type, status, amount):
+    return bucket(created_at, payment_type, status), amount
+
+
+@receiver(pre_save, sender=Payment)
+def remember_rollup_state(sender, instance, **kwargs):
+    # Loaded or saved instances know their stored state; read it only for
+    # ones built by hand around an existing pk.
+    if instance.pk is None:
+        instance._rollup_before = None
+        return
+    state = getattr(instance, "_rollup_state", None)
+    if state is None:
+        state = (
+            Payment.objects.filter(pk=instance.pk)
+            .values_list(*Payment.ROLLUP_FIELDS)
+            .first()
+        )
+    instance._rollup_before = state and rollup_state(*state)
+
+
+@receiver(post_save, sender=Payment)
+def update_rollup_on_save(sender, instance, **kwargs):
+    after = rollup_state(
+        instance.created_at, instance.type, instance.status, instance.money_to_pay
+    )
+    before = instance._rollup_before
+    if before != after:
+        apply_changes([(before, after)])
+    instance.remember_rollup_state()
+
+
+@receiver(post_delete, sender=Payment)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    apply_changes(
+        [
+            (
+                rollup_state(
+                    instance.created_at,
+                    instance.type,
+                    instance.status,
+                    instance.money_to_pay,
+                ),
+                None,
+            )
+        ]
+    )
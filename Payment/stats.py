@@ -0,0 +1,159 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from Payment.models import Payment, PaymentDailyStat
+
+
+def bucket(created_at, payment_type, status):
+    return timezone.localdate(created_at), payment_type, status
+
+
+def apply_changes(changes):
+    """
+    Move payments between rollup buckets.
+
+    ``changes`` is an iterable of ``(before, after)`` pairs, one per payment.
+    Each side is a ``(bucket, amount)`` pair, or ``None`` for a created or
+    deleted payment.
+    """
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for before, after in changes:
+        for side, sign in ((before, -1), (after, 1)):
+            if side is not None:
+                key, amount = side
+                deltas[key][0] += sign
+                deltas[key][1] += sign * Decimal(str(amount))
+
+    add_to_buckets(
+        (day, payment_type, status, count, amount)
+        for (day, payment_type, status), (count, amount) in deltas.items()
+    )
+
+
+def add_to_buckets(rows):
+    """Add ``(day, type, status, count, amount)`` deltas to the rollup."""
+    rows = [row for row in rows if row[3] or row[4]]
+    if not rows:
+        return
+
+    # One race-free statement for all buckets (PostgreSQL and SQLite).
+    table = connection.ops.quote_name(PaymentDailyStat._meta.db_table)
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (day, type, status, count, amount) "
+            f"VALUES {placeholders} "
+            f"ON CONFLICT (day, type, status) DO UPDATE SET "
+            f"count = {table}.count + excluded.count, "
+            f"amount = {table}.amount + excluded.amount",
+            [value for row in rows for value in row],
+        )
+
+
+def update_payment_status(queryset, status):
+    """
+    ``queryset.update(status=status)`` that keeps the daily rollup in step.
+
+    The matching payments are locked and read first, so their old buckets
+    are known. Returns the number of payments changed.
+    """
+    with transaction.atomic(savepoint=False):
+        rows = list(
+            queryset.exclude(status=status)
+            .select_for_update()
+            .values_list("pk", "created_at", "type", "status", "money_to_pay")
+        )
+        if not rows:
+            return 0
+
+        # Conditional as well, for backends without row locks (SQLite).
+        updated = (
+            Payment.objects.filter(pk__in=[row[0] for row in rows])
+            .exclude(status=status)
+            .update(status=status, updated_at=timezone.now())
+        )
+        if not updated:
+            return 0
+        apply_changes(
+            (
+                (bucket(created_at, payment_type, old_status), amount),
+                (bucket(created_at, payment_type, status), amount),
+            )
+            for _, created_at, payment_type, old_status, amount in rows
+        )
+
+    return updated
+
+
+def rebuild_daily_stats(date_from=None, date_to=None):
+    """
+    Correct the rollup from the payment table, one day at a time.
+
+    Each day's buckets are recomputed from a created_at range and only the
+    differences are added, so live upserts keep running and no transaction
+    spans more than a day. Without bounds every day with payments or rollup
+    rows is checked. Returns the number of buckets corrected.
+    """
+    if date_from is None or date_to is None:
+        payments = Payment.objects.aggregate(
+            first=Min("created_at"), last=Max("created_at")
+        )
+        stats = PaymentDailyStat.objects.aggregate(first=Min("day"), last=Max("day"))
+        days = [stats["first"], stats["last"]] + [
+            timezone.localdate(value)
+            for value in (payments["first"], payments["last"])
+            if value is not None
+        ]
+        days = [day for day in days if day is not None]
+        if not days:
+            return 0
+        date_from = date_from or min(days)
+        date_to = date_to or max(days)
+
+    corrected = 0
+    day = date_from
+    while day <= date_to:
+        corrected += rebuild_day(day)
+        day += timedelta(days=1)
+    return corrected
+
+
+def rebuild_day(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+    # Both reads from one snapshot, or a payment changed in between would be
+    # corrected twice. Only possible at the start of a transaction.
+    snapshot = connection.vendor == "postgresql" and not connection.in_atomic_block
+    with transaction.atomic():
+        if snapshot:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        actual = {
+            (row["type"], row["status"]): (row["count"], row["amount"])
+            for row in Payment.objects.filter(created_at__gte=start, created_at__lt=end)
+            .order_by()
+            .values("type", "status")
+            .annotate(count=Count("pk"), amount=Sum("money_to_pay"))
+        }
+        stored = {
+            (payment_type, status): (count, amount)
+            for payment_type, status, count, amount in PaymentDailyStat.objects.filter(
+                day=day
+            ).values_list("type", "status", "count", "amount")
+        }
+
+    deltas = []
+    for key in actual.keys() | stored.keys():
+        count, amount = actual.get(key, (0, Decimal(0)))
+        stored_count, stored_amount = stored.get(key, (0, Decimal(0)))
+        if (count, amount) != (stored_count, stored_amount):
+            deltas.append((day, *key, count - stored_count, amount - stored_amount))
+    add_to_buckets(deltas)
+    PaymentDailyStat.objects.filter(day=day, count=0, amount=0).delete()
+    return len(deltas)
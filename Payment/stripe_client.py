@@ -0,0 +1,203 @@
+import logging
+import threading
+import time
+
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from Library.metrics import observe_external_call
+from Library.timing import track
+
+logger = logging.getLogger(__name__)
+
+# Errors that say Stripe itself is struggling, as opposed to a bad request.
+OUTAGE_ERRORS = (
+    stripe.error.APIConnectionError,
+    stripe.error.APIError,
+    stripe.error.RateLimitError,
+)
+
+
+class CircuitOpenError(stripe.error.APIConnectionError):
+    """Raised instead of calling Stripe while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast after ``failure_threshold`` consecutive Stripe outages.
+
+    Once open, calls are rejected for ``reset_timeout`` seconds; then a single
+    trial call is let through and its outcome closes or reopens the circuit.
+    State is per process.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self.lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self.trial_running):
+                raise CircuitOpenError("Stripe circuit breaker is open")
+            if state == "half-open":
+                self.trial_running = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release_trial(self):
+        """End a trial call without an outcome, so another one can run."""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Stripe circuit breaker opened")
+                self.opened_at = time.monotonic()
+
+
+class CallStats:
+    """Per-operation call counts, errors and latency, for metrics."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+
+    def record(self, operation, duration, error=None):
+        with self.lock:
+            stats = self.operations.setdefault(
+                operation,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "rejected": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                },
+            )
+            stats["calls"] += 1
+            if isinstance(error, CircuitOpenError):
+                stats["rejected"] += 1
+            elif error is not None:
+                stats["errors"] += 1
+            duration_ms = duration * 1000
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                operation: {
+                    **stats,
+                    "avg_ms": stats["total_ms"] / stats["calls"],
+                }
+                for operation, stats in self.operations.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.operations.clear()
+
+
+breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+stats = CallStats()
+
+
+def configure():
+    """
+    Point the ``stripe`` library at ``settings.STRIPE_API_BASE`` through one
+    pooled keep-alive session, with explicit timeouts and retries.
+
+    Runs when the Payment app is ready; call again after changing settings.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.STRIPE_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    stripe.api_base = settings.STRIPE_API_BASE
+    # Stripe retries connection errors, 409s and 5xx with jittered
+    # exponential backoff, adding an idempotency key so POSTs are safe.
+    stripe.max_network_retries = settings.STRIPE_MAX_RETRIES
+    stripe.default_http_client = stripe.RequestsClient(
+        timeout=settings.STRIPE_TIMEOUT, session=session
+    )
+
+    breaker.failure_threshold = settings.STRIPE_BREAKER_THRESHOLD
+    breaker.reset_timeout = settings.STRIPE_BREAKER_RESET_TIMEOUT
+    breaker.record_success()
+
+
+def _record(operation, duration, error=None):
+    stats.record(operation, duration, error)
+    observe_external_call("stripe", operation, duration, error)
+
+
+def call(operation, method, *args, **kwargs):
+    """Call a ``stripe`` API ``method`` behind the circuit breaker, timing it."""
+    try:
+        breaker.before_call()
+    except CircuitOpenError as error:
+        stats.record(operation, 0, error)
+        observe_external_call("stripe", operation, None, error)
+        raise
+
+    started = time.perf_counter()
+    try:
+        with track("stripe"):
+            result = method(*args, **kwargs)
+    except OUTAGE_ERRORS as error:
+        breaker.record_failure()
+        _record(operation, time.perf_counter() - started, error)
+        raise
+    except stripe.error.StripeError as error:
+        # Stripe answered and rejected the request; it is not an outage.
+        breaker.record_success()
+        _record(operation, time.perf_counter() - started, error)
+        raise
+    except Exception as error:
+        # A bug on our side says nothing about Stripe's health.
+        breaker.release_trial()
+        _record(operation, time.perf_counter() - started, error)
+        raise
+
+    breaker.record_success()
+    _record(operation, time.perf_counter() - started)
+    return result
+
+
+def create_checkout_session(**params):
+    return call("checkout.session.create", stripe.checkout.Session.create, **params)
+
+
+def retrieve_checkout_session(session_id):
+    return call(
+        "checkout.session.retrieve", stripe.checkout.Session.retrieve, session_id
+    )
+
+
+def list_checkout_sessions(**params):
+    return call("checkout.session.list", stripe.checkout.Session.list, **params)
@@ -1,15 +1,90 @@
+import logging
+import time
+from datetime import timedelta
+
+import stripe
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
+
 from Payment.models import Payment
+from Payment.reconciliation import claim_run, format_report, reconcile
+from Payment.stats import rebuild_daily_stats
+from Payment.services import (
+    attach_stripe_session,
+    expire_stale_payments,
+    mark_payment_expired,
+)
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
-def expire_old_payments():
-    expiration_time = timezone.now() - timedelta(hours=1)
-    expired_count = Payment.objects.filter(
-        status="PENDING",
-        created_at__lt=expiration_time
-    ).update(status="EXPIRED")
+def expire_old_payments(batch_size=500):
+    """Safety sweep for payments whose scheduled expiry never ran."""
+    started = time.monotonic()
+    cutoff = timezone.now() - timedelta(seconds=settings.PAYMENT_SESSION_TTL)
+    expired_count, batches = expire_stale_payments(cutoff, batch_size)
+
+    report = (
+        f"Expired {expired_count} payment(s) in {batches} batch(es) "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+    logger.info(report)
+    return report
+
+
+@shared_task
+def expire_payment(session_id):
+    # Keyed by session, so a payment that got a new session since is skipped.
+    expired = mark_payment_expired(session_id)
+    return f"Expired {expired} payment(s)"
+
 
-    return f"Expired {expired_count} payment(s)"
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def create_payment_session(self, payment_id, success_url, cancel_url, description):
+    payment = (
+        Payment.objects.select_related("borrowing__book")
+        .filter(pk=payment_id, session_id__isnull=True)
+        .first()
+    )
+    if payment is None:
+        return f"Payment {payment_id} already has a session"
+
+    try:
+        attach_stripe_session(payment, success_url, cancel_url, description)
+    except stripe.error.InvalidRequestError as error:
+        # Retrying cannot help, e.g. after earlier retries the payment's
+        # expires_at is less than Stripe's 30 minutes away. The payment is
+        # left to expire.
+        logger.warning("No session for payment %s: %s", payment_id, error)
+        return f"Stripe rejected the session for payment {payment_id}"
+    except stripe.error.StripeError as error:
+        raise self.retry(exc=error)
+
+    return f"Created session for payment {payment_id}"
+
+
+@shared_task
+def reconcile_stripe_payments(hours=48, page_size=100):
+    """Resume a failed or stale reconciliation, or check the last ``hours``."""
+    run = claim_run(hours)
+    if run is None:
+        return "Another reconciliation is still running"
+
+    run = reconcile(run, page_size)
+    report = format_report(run)
+    logger.info(report)
+    return report
+
+
+@shared_task
+def rebuild_payment_stats(days=None):
+    """
+    Correct drift of the live rollup updates over the last ``days`` days
+    (default ``PAYMENT_STATS_REBUILD_DAYS``).
+    """
+    today = timezone.localdate()
+    days = days or settings.PAYMENT_STATS_REBUILD_DAYS
+    corrected = rebuild_daily_stats(today - timedelta(days=days), today)
+    return f"Corrected {corrected} daily stat row(s)"
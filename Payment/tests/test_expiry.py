@@ -0,0 +1,98 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import stripe
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Payment.models import Payment
+from Payment.services import attach_stripe_session
+from Payment.tasks import create_payment_session, expire_old_payments, expire_payment
+
+
+class PaymentExpiryTestCase(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="expiry@test.com", password="pass"
+        )
+        book = Book.objects.create(title="Book", inventory=5, daily_fee=1)
+        self.borrowing = Borrowing.objects.create(
+            user=user, book=book, expected_return_date="2030-01-05"
+        )
+
+    def create_payment(self, age, status="PENDING", session_id=None):
+        return Payment.objects.create(
+            borrowing=self.borrowing,
+            status=status,
+            money_to_pay=5,
+            session_id=session_id,
+            created_at=timezone.now() - age,
+        )
+
+    def test_sweep_expires_old_pending_payments_in_batches(self):
+        old = [self.create_payment(timedelta(hours=3)) for _ in range(5)]
+        fresh = self.create_payment(timedelta(minutes=5))
+        paid = self.create_payment(timedelta(hours=3), status="PAID")
+
+        report = expire_old_payments(batch_size=2)
+
+        self.assertTrue(report.startswith("Expired 5 payment(s) in 3 batch(es)"))
+        self.assertEqual(
+            set(Payment.objects.filter(status="EXPIRED").values_list("id", flat=True)),
+            {payment.id for payment in old},
+        )
+        fresh.refresh_from_db()
+        paid.refresh_from_db()
+        self.assertEqual((fresh.status, paid.status), ("PENDING", "PAID"))
+
+    def test_expire_payment_by_session(self):
+        payment = self.create_payment(timedelta(hours=1), session_id="cs_old")
+
+        expire_payment("cs_old")
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "EXPIRED")
+
+    def test_expire_payment_skips_replaced_session(self):
+        payment = self.create_payment(timedelta(hours=1), session_id="cs_new")
+
+        self.assertEqual(expire_payment("cs_old"), "Expired 0 payment(s)")
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "PENDING")
+
+    @patch("Payment.services.schedule_payment_expiry")
+    @patch("Payment.services.create_stripe_session", return_value=("url", "cs_1"))
+    def test_retries_send_the_same_expiry(self, mock_session, mock_expiry):
+        payment = self.create_payment(timedelta(minutes=45))
+
+        for _ in range(2):
+            Payment.objects.filter(pk=payment.pk).update(session_id=None)
+            attach_stripe_session(payment, "http://ok", "http://cancel", "")
+
+        first, second = [call.kwargs for call in mock_session.call_args_list]
+        self.assertEqual(first["idempotency_key"], second["idempotency_key"])
+        self.assertEqual(
+            second["expires_at"],
+            payment.created_at + timedelta(seconds=settings.PAYMENT_SESSION_TTL),
+        )
+        self.assertEqual(first["expires_at"], second["expires_at"])
+
+    @patch("Payment.services.create_stripe_session")
+    def test_rejected_session_is_not_retried(self, mock_session):
+        mock_session.side_effect = stripe.error.InvalidRequestError(
+            "expires_at must be at least 30 minutes from now.", "expires_at"
+        )
+        payment = self.create_payment(timedelta(minutes=35))
+
+        result = create_payment_session(payment.pk, "http://ok", "http://cancel", "")
+
+        self.assertIn("rejected", result)
+        mock_session.assert_called_once()
+        payment.refresh_from_db()
+        self.assertIsNone(payment.session_id)
@@ -0,0 +1,127 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Payment.models import Payment
+
+
+class PaymentExportTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("Payment:payments-export")
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="pass"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        book = Book.objects.create(title="Dune", inventory=5, daily_fee=1)
+        borrowing = Borrowing.objects.create(
+            user=self.admin, book=book, expected_return_date="2030-01-05"
+        )
+        self.payments = [
+            Payment.objects.create(
+                borrowing=borrowing,
+                money_to_pay=index + 1,
+                type="FINE" if index % 3 == 0 else "PAYMENT",
+                status="PAID" if index % 2 else "PENDING",
+                created_at=timezone.now() - timedelta(days=index),
+            )
+            for index in range(30)
+        ]
+
+    def get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv(self):
+        response, content = self.get()
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="payments.csv"', response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(
+            [int(row["id"]) for row in rows], [p.pk for p in self.payments]
+        )
+        self.assertEqual(rows[0]["borrowing__book__title"], "Dune")
+        self.assertEqual(rows[0]["money_to_pay"], "1.00")
+
+    def test_jsonl_with_list_filters_and_date_range(self):
+        today = timezone.localdate()
+        response, content = self.get(
+            export_format="jsonl",
+            type="fine",
+            status="PAID",
+            date_from=today - timedelta(days=20),
+            date_to=today - timedelta(days=1),
+        )
+
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [self.payments[index].pk for index in (3, 9, 15)],
+        )
+
+    def test_date_range_covers_whole_days(self):
+        today = timezone.localdate()
+        midnight = timezone.make_aware(datetime.combine(today, time.min))
+        Payment.objects.filter(pk=self.payments[1].pk).update(
+            created_at=midnight - timedelta(microseconds=1)
+        )
+        Payment.objects.filter(pk=self.payments[2].pk).update(created_at=midnight)
+
+        _, content = self.get(
+            export_format="jsonl",
+            date_from=today - timedelta(days=1),
+            date_to=today - timedelta(days=1),
+        )
+
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.payments[1].pk])
+
+    def test_gzip(self):
+        response, content = self.get(gzip="true")
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn('filename="payments.csv.gz"', response["Content-Disposition"])
+        self.assertEqual(len(gzip.decompress(content).decode().splitlines()), 31)
+
+    @override_settings(EXPORT_CHUNK_SIZE=5)
+    def test_rows_are_streamed_in_blocks(self):
+        Payment.objects.bulk_create(
+            Payment(borrowing=self.payments[0].borrowing, money_to_pay=1)
+            for _ in range(3000)
+        )
+        response = self.client.get(self.url, {"export_format": "jsonl"})
+
+        blocks = list(response.streaming_content)
+
+        self.assertGreater(len(blocks), 1)
+        self.assertEqual(b"".join(blocks).count(b"\n"), 3030)
+
+    def test_only_admins(self):
+        user = get_user_model().objects.create_user(
+            email="user@test.com", password="pass"
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_format(self):
+        response = self.client.get(self.url, {"export_format": "xlsx"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -4,14 +4,17 @@ from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from datetime import date, timedelta
+from unittest.mock import patch
 
 from Book.models import Book
 from Borrowing.models import Borrowing
+from Library.throttling import get_bucket
 from Payment.models import Payment
 
 
 class PaymentViewSetTestCase(TestCase):
     def setUp(self):
+        get_bucket().reset()
         Payment.objects.all().delete()
         self.client = APIClient()
 
@@ -53,8 +56,8 @@ class PaymentViewSetTestCase(TestCase):
         response = self.client.get(reverse("Payment:payments-list"))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["borrowing"], self.borrowing.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["borrowing"], self.borrowing.id)
 
     def test_filter_payments_by_type(self):
         Payment.objects.create(
@@ -69,8 +72,8 @@ class PaymentViewSetTestCase(TestCase):
         response = self.client.get(reverse("Payment:payments-list") + "?type=FINE")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["type"], "FINE")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["type"], "FINE")
 
     def test_filter_payments_by_status(self):
         Payment.objects.create(
@@ -85,8 +88,8 @@ class PaymentViewSetTestCase(TestCase):
         response = self.client.get(reverse("Payment:payments-list") + "?status=PAID")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["status"], "PAID")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["status"], "PAID")
 
     def test_admin_sees_all_payments(self):
         other_user = get_user_model().objects.create_user(
@@ -107,7 +110,113 @@ class PaymentViewSetTestCase(TestCase):
         response = self.client.get(reverse("Payment:payments-list"))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_payments_are_cursor_paginated(self):
+        for index in range(4):
+            Payment.objects.create(
+                borrowing=self.borrowing,
+                status="PAID",
+                type="PAYMENT",
+                money_to_pay=10,
+                session_url="https://stripe.com/paid",
+                session_id=f"sess_page_{index}",
+            )
+
+        response = self.client.get(reverse("Payment:payments-list") + "?page_size=2")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        first_page = [payment["id"] for payment in response.data["results"]]
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(first_page, sorted(first_page, reverse=True))
+
+        response = self.client.get(response.data["next"])
+        second_page = [payment["id"] for payment in response.data["results"]]
+        self.assertEqual(len(second_page), 2)
+        self.assertLess(max(second_page), min(first_page))
+
+    def test_page_size_is_capped(self):
+        with patch(
+            "Library.pagination.LibraryCursorPagination.max_page_size", 1
+        ):
+            Payment.objects.create(
+                borrowing=self.borrowing,
+                status="PAID",
+                type="PAYMENT",
+                money_to_pay=10,
+                session_url="https://stripe.com/paid",
+                session_id="sess_capped",
+            )
+            response = self.client.get(
+                reverse("Payment:payments-list") + "?page_size=1000"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_list_sends_validators_and_honours_if_none_match(self):
+        url = reverse("Payment:payments-list")
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_etag_changes_when_payment_status_changes(self):
+        url = reverse("Payment:payments-list")
+        etag = self.client.get(url)["ETag"]
+
+        self.payment.status = "PAID"
+        self.payment.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_ignores_if_modified_since(self):
+        url = reverse("Payment:payments-list")
+        since = "Fri, 01 Jan 2100 00:00:00 GMT"
+
+        response = self.client.get(
+            url, {"status": "PENDING"}, HTTP_IF_MODIFIED_SINCE=since
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.payment.status = "PAID"
+        self.payment.save()
+        response = self.client.get(
+            url, {"status": "PENDING"}, HTTP_IF_MODIFIED_SINCE=since
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+    def test_retrieve_sends_last_modified(self):
+        url = reverse("Payment:payments-detail", args=[self.payment.id])
+
+        self.assertIn("Last-Modified", self.client.get(url))
+
+    def test_borrowing_etag_tracks_its_payments(self):
+        url = reverse("Borrowing:borrowing-detail", args=[self.borrowing.id])
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.payment.status = "PAID"
+        self.payment.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["payments"][0]["status"], "PAID")
 
     def test_return_book_success(self):
         borrowing = Borrowing.objects.create(
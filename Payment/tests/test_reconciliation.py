@@ -0,0 +1,142 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from Book.models import Book
+from Borrowing.models import Borrowing, TelegramMessage
+from Payment import stripe_client
+from Payment.fake_stripe import FakeStripeServer
+from Payment.models import Payment, ReconciliationRun
+from Payment.reconciliation import reconcile
+from Payment.tasks import reconcile_stripe_payments
+
+
+class ReconciliationTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeStripeServer().start()
+        self.addCleanup(self.server.stop)
+
+        settings_override = override_settings(
+            STRIPE_SECRET_KEY="sk_test_fake",
+            STRIPE_API_BASE=self.server.url,
+            STRIPE_MAX_RETRIES=0,
+        )
+        settings_override.enable()
+        self.addCleanup(stripe_client.configure)
+        self.addCleanup(settings_override.disable)
+        stripe_client.configure()
+
+        user = get_user_model().objects.create_user(
+            email="reconcile@test.com", password="pass"
+        )
+        book = Book.objects.create(title="Book", inventory=5, daily_fee=1)
+        self.borrowing = Borrowing.objects.create(
+            user=user, book=book, expected_return_date="2030-01-05"
+        )
+
+    def add(self, status, session_status="open", payment_status="unpaid"):
+        session = self.server.add_session(
+            status=session_status, payment_status=payment_status
+        )
+        return Payment.objects.create(
+            borrowing=self.borrowing,
+            status=status,
+            money_to_pay=5,
+            session_id=session["id"],
+        )
+
+    def new_run(self):
+        now = timezone.now()
+        return ReconciliationRun.objects.create(
+            window_start=now - timedelta(hours=1), window_end=now + timedelta(minutes=1)
+        )
+
+    def test_fixes_drifted_payments_page_by_page(self):
+        paid_but_expired = self.add("EXPIRED", "complete", "paid")
+        paid_but_pending = self.add("PENDING", "complete", "paid")
+        expired_but_pending = self.add("PENDING", "expired")
+        in_sync = self.add("PAID", "complete", "paid")
+        still_open = self.add("PENDING")
+        self.server.add_session(status="complete", payment_status="paid")
+
+        run = reconcile(self.new_run(), page_size=2)
+
+        statuses = dict(Payment.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[paid_but_expired.pk], "PAID")
+        self.assertEqual(statuses[paid_but_pending.pk], "PAID")
+        self.assertEqual(statuses[expired_but_pending.pk], "EXPIRED")
+        self.assertEqual(statuses[in_sync.pk], "PAID")
+        self.assertEqual(statuses[still_open.pk], "PENDING")
+        self.assertEqual(run.status, "COMPLETED")
+        self.assertEqual(
+            (run.pages, run.sessions_seen, run.payments_fixed, run.unmatched_sessions),
+            (3, 6, 3, 1),
+        )
+        self.assertEqual(len(run.report), 4)
+
+    def test_failed_run_resumes_from_checkpoint(self):
+        first = self.add("PENDING", "complete", "paid")
+        second = self.add("PENDING", "complete", "paid")
+        run = self.new_run()
+        # The newest session was handled before the run failed.
+        run.cursor = second.session_id
+        run.status = "FAILED"
+        run.save()
+        Payment.objects.filter(pk=second.pk).update(status="PAID")
+
+        reconcile_stripe_payments()
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, "COMPLETED")
+        self.assertEqual(run.sessions_seen, 1)
+        self.assertEqual(Payment.objects.get(pk=first.pk).status, "PAID")
+
+    def test_outage_marks_run_failed(self):
+        self.add("PENDING", "complete", "paid")
+        self.server.fail_status = 503
+        out, err = StringIO(), StringIO()
+
+        with self.assertRaises(Exception):
+            call_command("reconcile_payments", stdout=out, stderr=err)
+
+        run = ReconciliationRun.objects.get()
+        self.assertEqual(run.status, "FAILED")
+        self.assertIn(f"--resume {run.pk}", err.getvalue())
+
+    def test_payments_fixed_to_paid_are_notified(self):
+        self.add("PENDING", "complete", "paid")
+        self.add("PENDING", "expired")
+
+        reconcile(self.new_run())
+
+        self.assertEqual(TelegramMessage.objects.count(), 1)
+        self.assertIn("reconcile@test.com", TelegramMessage.objects.get().text)
+
+    def test_run_in_progress_is_not_started_twice(self):
+        pending = self.add("PENDING", "complete", "paid")
+        run = self.new_run()
+
+        report = reconcile_stripe_payments()
+
+        self.assertIn("still running", report)
+        self.assertEqual(ReconciliationRun.objects.get().pk, run.pk)
+        self.assertEqual(Payment.objects.get(pk=pending.pk).status, "PENDING")
+        with self.assertRaisesMessage(CommandError, "another process"):
+            call_command("reconcile_payments", resume=run.pk, stdout=StringIO())
+
+    def test_stale_run_is_resumed(self):
+        pending = self.add("PENDING", "complete", "paid")
+        run = self.new_run()
+        ReconciliationRun.objects.filter(pk=run.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        reconcile_stripe_payments()
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, "COMPLETED")
+        self.assertEqual(Payment.objects.get(pk=pending.pk).status, "PAID")
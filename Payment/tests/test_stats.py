@@ -0,0 +1,241 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Payment.models import Payment, PaymentDailyStat
+from Payment.services import expire_stale_payments, mark_payment_paid
+from Payment.stats import rebuild_daily_stats
+from Payment.tasks import rebuild_payment_stats
+
+
+def rollup():
+    return {
+        (stat.day, stat.type, stat.status): (stat.count, stat.amount)
+        for stat in PaymentDailyStat.objects.all()
+    }
+
+
+class PaymentDailyStatTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="stats@test.com", password="pass"
+        )
+        book = Book.objects.create(title="Book", inventory=5, daily_fee=1)
+        self.borrowing = Borrowing.objects.create(
+            user=self.user, book=book, expected_return_date="2030-01-05"
+        )
+        self.today = timezone.localdate()
+
+    def create_payment(self, amount, session_id=None, age=timedelta(), **kwargs):
+        return Payment.objects.create(
+            borrowing=self.borrowing,
+            money_to_pay=amount,
+            session_id=session_id,
+            created_at=timezone.now() - age,
+            **kwargs,
+        )
+
+    def test_rollup_follows_status_changes(self):
+        self.create_payment(10, session_id="cs_1")
+        self.create_payment(Decimal("2.50"), session_id="cs_2")
+        fine = self.create_payment(4, type="FINE")
+        self.assertEqual(
+            rollup(),
+            {
+                (self.today, "PAYMENT", "PENDING"): (2, Decimal("12.50")),
+                (self.today, "FINE", "PENDING"): (1, Decimal("4.00")),
+            },
+        )
+
+        mark_payment_paid("cs_1")
+        fine.money_to_pay = 6
+        fine.save()
+        fine.delete()
+
+        self.assertEqual(
+            rollup(),
+            {
+                (self.today, "PAYMENT", "PENDING"): (1, Decimal("2.50")),
+                (self.today, "PAYMENT", "PAID"): (1, Decimal("10.00")),
+                (self.today, "FINE", "PENDING"): (0, Decimal("0.00")),
+            },
+        )
+
+    def test_sweep_moves_payments_to_expired(self):
+        for _ in range(3):
+            self.create_payment(5, age=timedelta(hours=3))
+
+        expire_stale_payments(timezone.now() - timedelta(hours=1), batch_size=2)
+
+        self.assertEqual(
+            rollup(),
+            {
+                (self.today, "PAYMENT", "PENDING"): (0, Decimal("0.00")),
+                (self.today, "PAYMENT", "EXPIRED"): (3, Decimal("15.00")),
+            },
+        )
+
+    def test_rebuild_matches_incremental_rollup(self):
+        self.create_payment(10, session_id="cs_1", age=timedelta(days=2))
+        self.create_payment(7, session_id="cs_2")
+        self.create_payment(3, type="FINE", status="PAID")
+        mark_payment_paid("cs_2")
+        incremental = {key: value for key, value in rollup().items() if value[0]}
+
+        PaymentDailyStat.objects.update(count=99)
+        # The three drifted buckets and the empty PENDING one.
+        self.assertEqual(rebuild_payment_stats(), "Corrected 4 daily stat row(s)")
+
+        self.assertEqual(rollup(), incremental)
+        self.assertEqual(rebuild_daily_stats(), 0)
+
+    def test_rebuild_only_touches_the_given_days(self):
+        self.create_payment(10, age=timedelta(days=40))
+        self.create_payment(5)
+        PaymentDailyStat.objects.update(count=99)
+
+        self.assertEqual(rebuild_payment_stats(), "Corrected 1 daily stat row(s)")
+
+        self.assertEqual(
+            sorted(rollup().values()), [(1, Decimal("5.00")), (99, Decimal("10.00"))]
+        )
+
+    def test_command_backfills_the_whole_history(self):
+        self.create_payment(10, age=timedelta(days=400))
+        self.create_payment(5)
+        PaymentDailyStat.objects.all().delete()
+        out = StringIO()
+
+        call_command("rebuild_payment_stats", stdout=out)
+
+        self.assertEqual(out.getvalue().strip(), "Corrected 2 daily stat row(s)")
+        self.assertEqual(
+            sorted(rollup().values()), [(1, Decimal("5.00")), (1, Decimal("10.00"))]
+        )
+
+    def test_saving_a_loaded_payment_does_not_select_it_again(self):
+        payment = Payment.objects.get(pk=self.create_payment(10).pk)
+        payment.status = "PAID"
+
+        with CaptureQueriesContext(connection) as queries:
+            payment.save()
+
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("SELECT")]
+        )
+        self.assertEqual(
+            rollup()[(self.today, "PAYMENT", "PAID")], (1, Decimal("10.00"))
+        )
+
+    def test_refreshed_payment_moves_from_its_current_bucket(self):
+        payment = self.create_payment(10, session_id="cs_1")
+        mark_payment_paid("cs_1")
+        payment.refresh_from_db()
+        payment.status = "EXPIRED"
+        payment.save()
+
+        self.assertEqual(
+            {key[2]: value[0] for key, value in rollup().items()},
+            {"PENDING": 0, "PAID": 0, "EXPIRED": 1},
+        )
+
+
+class PaymentStatsViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("Payment:payments-stats")
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="pass"
+        )
+        self.today = timezone.localdate()
+        PaymentDailyStat.objects.bulk_create(
+            [
+                PaymentDailyStat(
+                    day=self.today, type="PAYMENT", status="PAID", count=2, amount=20
+                ),
+                PaymentDailyStat(
+                    day=self.today - timedelta(days=1),
+                    type="PAYMENT",
+                    status="PAID",
+                    count=1,
+                    amount=5,
+                ),
+                PaymentDailyStat(
+                    day=self.today, type="FINE", status="PENDING", count=1, amount=3
+                ),
+                PaymentDailyStat(
+                    day=self.today - timedelta(days=60),
+                    type="FINE",
+                    status="PAID",
+                    count=4,
+                    amount=40,
+                ),
+            ]
+        )
+
+    def test_only_admins(self):
+        user = get_user_model().objects.create_user(
+            email="user@test.com", password="pass"
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_defaults_to_last_30_days_and_reads_only_the_rollup(self):
+        self.client.force_authenticate(user=self.admin)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(
+            response.data["totals"],
+            [
+                {"type": "FINE", "status": "PENDING", "count": 1, "amount": "3.00"},
+                {"type": "PAYMENT", "status": "PAID", "count": 3, "amount": "25.00"},
+            ],
+        )
+        payment_table = Payment._meta.db_table
+        self.assertFalse(
+            [query for query in queries if f'"{payment_table}"' in query["sql"]]
+        )
+
+    def test_filters(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(
+            self.url,
+            {
+                "date_from": self.today - timedelta(days=90),
+                "date_to": self.today - timedelta(days=1),
+                "type": "FINE",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["totals"],
+            [{"type": "FINE", "status": "PAID", "count": 4, "amount": "40.00"}],
+        )
+
+    def test_invalid_filter(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(self.url, {"status": "REFUNDED"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,104 @@
+import stripe
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Payment import stripe_client
+from Payment.fake_stripe import FakeStripeServer
+from Payment.services import create_stripe_session
+
+
+class StripeClientTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeStripeServer().start()
+        self.addCleanup(self.server.stop)
+
+        settings_override = override_settings(
+            STRIPE_SECRET_KEY="sk_test_fake",
+            STRIPE_API_BASE=self.server.url,
+            STRIPE_MAX_RETRIES=0,
+            STRIPE_BREAKER_THRESHOLD=2,
+            STRIPE_BREAKER_RESET_TIMEOUT=30,
+        )
+        settings_override.enable()
+        # Cleanups run last-in first-out: restore settings, then reconfigure.
+        self.addCleanup(stripe_client.configure)
+        self.addCleanup(settings_override.disable)
+        stripe_client.configure()
+        stripe_client.stats.reset()
+
+        user = get_user_model().objects.create_user(
+            email="stripe@test.com", password="pass"
+        )
+        book = Book.objects.create(
+            title="Book", author="Author", inventory=3, daily_fee=1
+        )
+        self.borrowing = Borrowing.objects.create(
+            user=user, book=book, expected_return_date="2030-01-05"
+        )
+
+    def create_session(self):
+        return create_stripe_session(
+            self.borrowing,
+            request=None,
+            amount=7,
+            success_url="http://testserver/success",
+            cancel_url="http://testserver/cancel",
+        )
+
+    def test_create_and_retrieve_through_configured_client(self):
+        session_url, session_id = self.create_session()
+
+        self.assertTrue(session_url.startswith(self.server.url))
+        session = stripe_client.retrieve_checkout_session(session_id)
+        self.assertEqual(session.metadata["borrowing_id"], str(self.borrowing.id))
+
+        stats = stripe_client.stats.snapshot()
+        self.assertEqual(stats["checkout.session.create"]["calls"], 1)
+        self.assertEqual(stats["checkout.session.retrieve"]["errors"], 0)
+
+    def test_breaker_opens_after_outage_and_fails_fast(self):
+        self.server.fail_status = 503
+
+        for _ in range(2):
+            with self.assertRaises(stripe.error.APIError):
+                self.create_session()
+        with self.assertRaises(stripe_client.CircuitOpenError):
+            self.create_session()
+
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(stripe_client.breaker.state, "open")
+        stats = stripe_client.stats.snapshot()["checkout.session.create"]
+        self.assertEqual((stats["errors"], stats["rejected"]), (2, 1))
+
+    def test_breaker_closes_after_successful_trial(self):
+        self.server.fail_status = 503
+        for _ in range(2):
+            with self.assertRaises(stripe.error.APIError):
+                self.create_session()
+
+        self.server.fail_status = None
+        stripe_client.breaker.reset_timeout = 0
+        self.create_session()
+
+        self.assertEqual(stripe_client.breaker.state, "closed")
+
+    def test_rejected_request_does_not_open_breaker(self):
+        for _ in range(3):
+            with self.assertRaises(stripe.error.InvalidRequestError):
+                stripe_client.retrieve_checkout_session("cs_missing")
+
+        self.assertEqual(stripe_client.breaker.state, "closed")
+
+    def test_programming_errors_leave_breaker_alone(self):
+        def broken(**params):
+            raise TypeError
+
+        stripe_client.breaker.failures = 1
+        for _ in range(3):
+            with self.assertRaises(TypeError):
+                stripe_client.call("test.broken", broken)
+
+        self.assertEqual(stripe_client.breaker.failures, 1)
+        self.assertEqual(stripe_client.breaker.state, "closed")
@@ -1,7 +1,16 @@
+import threading
+import time
+
+import stripe
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from unittest.mock import patch
+from Payment import stripe_client
 from Payment.models import Payment
 from Borrowing.models import Borrowing
 from django.contrib.auth import get_user_model
@@ -12,6 +21,7 @@ User = get_user_model()
 
 class PaymentSuccessCancelTestCase(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(email="test@example.com", password="pass")
         self.client.force_authenticate(self.user)
 
@@ -50,9 +60,95 @@ class PaymentSuccessCancelTestCase(APITestCase):
         self.assertEqual(self.payment.status, "PAID")
         self.assertIn("Payment completed successfully", response.data["message"])
 
+    @patch("Payment.views.stripe.checkout.Session.retrieve")
+    def test_payment_success_while_breaker_is_open(self, mock_retrieve):
+        with patch.object(stripe_client.breaker, "opened_at", time.monotonic()):
+            response = self.client.get(
+                reverse("Payment:payment-success"),
+                {"session_id": self.payment.session_id},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "30")
+        mock_retrieve.assert_not_called()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "PENDING")
+
     def test_payment_cancel(self):
         url = reverse("Payment:payment-cancel")
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("Payment was cancelled", response.data["message"])
+
+
+class ConcurrentPaymentSuccessTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(email="clicks@example.com", password="pass")
+        book = Book.objects.create(title="Book", inventory=3, daily_fee=1)
+        borrowing = Borrowing.objects.create(
+            user=user, book=book, expected_return_date="2030-01-05"
+        )
+        self.payment = Payment.objects.create(
+            borrowing=borrowing, money_to_pay=4, session_id="cs_double_click"
+        )
+        self.url = reverse("Payment:payment-success") + "?session_id=cs_double_click"
+
+    @patch("Payment.services.send_telegram_message")
+    @patch("Payment.views.stripe_client.retrieve_checkout_session")
+    def test_simultaneous_callbacks_share_one_lookup(self, mock_retrieve, mock_send):
+        def slow_retrieve(session_id):
+            time.sleep(0.2)
+            return type("Session", (), {"payment_status": "paid"})()
+
+        mock_retrieve.side_effect = slow_retrieve
+        callers = 10
+        barrier = threading.Barrier(callers)
+        statuses = []
+
+        def callback():
+            try:
+                barrier.wait()
+                statuses.append(APIClient().get(self.url).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=callback) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [status.HTTP_200_OK] * callers)
+        mock_retrieve.assert_called_once_with("cs_double_click")
+        mock_send.assert_called_once()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "PAID")
+
+    @patch("Payment.views.stripe_client.retrieve_checkout_session")
+    def test_failed_lookup_is_not_repeated_by_waiters(self, mock_retrieve):
+        def failing_retrieve(session_id):
+            time.sleep(0.2)
+            raise stripe.error.APIConnectionError("Stripe is down")
+
+        mock_retrieve.side_effect = failing_retrieve
+        callers = 10
+        barrier = threading.Barrier(callers)
+        statuses = []
+
+        def callback():
+            try:
+                barrier.wait()
+                statuses.append(APIClient().get(self.url).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=callback) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [status.HTTP_503_SERVICE_UNAVAILABLE] * callers)
+        mock_retrieve.assert_called_once_with("cs_double_click")
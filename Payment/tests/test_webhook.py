@@ -0,0 +1,155 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from Book.models import Book
+from Borrowing.models import Borrowing
+from Payment.models import Payment, ProcessedStripeEvent
+from Payment.webhooks import sign_payload
+
+SECRET = "whsec_test"
+
+
+def make_payment(session_id="cs_test_webhook"):
+    user = get_user_model().objects.create_user(
+        email="webhook@test.com", password="pass"
+    )
+    book = Book.objects.create(title="Book", author="Author", inventory=3, daily_fee=1)
+    borrowing = Borrowing.objects.create(
+        user=user, book=book, expected_return_date="2030-01-05"
+    )
+    return Payment.objects.create(
+        borrowing=borrowing,
+        status="PENDING",
+        type="PAYMENT",
+        money_to_pay=4,
+        session_id=session_id,
+    )
+
+
+def make_event(event_type, session_id, event_id="evt_1", payment_status="paid"):
+    return {
+        "id": event_id,
+        "object": "event",
+        "type": event_type,
+        "data": {
+            "object": {
+                "id": session_id,
+                "object": "checkout.session",
+                "payment_status": payment_status,
+            }
+        },
+    }
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=SECRET)
+class StripeWebhookTestCase(APITestCase):
+    def setUp(self):
+        self.payment = make_payment()
+        self.url = reverse("Payment:stripe-webhook")
+
+    def post_event(self, event, secret=SECRET):
+        payload = json.dumps(event)
+        return self.client.post(
+            self.url,
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=sign_payload(payload, secret),
+        )
+
+    @patch("Payment.services.send_telegram_message")
+    def test_completed_marks_payment_paid_once(self, mock_send):
+        event = make_event("checkout.session.completed", self.payment.session_id)
+
+        for _ in range(3):
+            response = self.post_event(event)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "PAID")
+        self.assertEqual(ProcessedStripeEvent.objects.count(), 1)
+        mock_send.assert_called_once()
+
+    def test_completed_but_unpaid_is_ignored(self):
+        event = make_event(
+            "checkout.session.completed",
+            self.payment.session_id,
+            payment_status="unpaid",
+        )
+
+        self.post_event(event)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "PENDING")
+
+    def test_expired_marks_pending_payment_expired(self):
+        event = make_event("checkout.session.expired", self.payment.session_id)
+
+        self.post_event(event)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "EXPIRED")
+
+    def test_expired_does_not_override_paid(self):
+        Payment.objects.filter(pk=self.payment.pk).update(status="PAID")
+        event = make_event("checkout.session.expired", self.payment.session_id)
+
+        self.post_event(event)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "PAID")
+
+    def test_invalid_signature(self):
+        event = make_event("checkout.session.completed", self.payment.session_id)
+
+        response = self.post_event(event, secret="whsec_wrong")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "PENDING")
+        self.assertFalse(ProcessedStripeEvent.objects.exists())
+
+    @patch("Payment.views.stripe.checkout.Session.retrieve")
+    def test_success_redirect_after_webhook_skips_stripe(self, mock_retrieve):
+        self.post_event(
+            make_event("checkout.session.completed", self.payment.session_id)
+        )
+        self.client.force_authenticate(self.payment.borrowing.user)
+
+        response = self.client.get(
+            reverse("Payment:payment-success")
+            + f"?session_id={self.payment.session_id}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_retrieve.assert_not_called()
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=SECRET)
+class ReplayStripeWebhooksTestCase(LiveServerTestCase):
+    @patch("Borrowing.tasks.flush_telegram_outbox.apply_async")
+    def test_replay_fixtures(self, mock_flush):
+        payment = make_payment(session_id="cs_test_replay_live")
+        out = StringIO()
+
+        call_command(
+            "replay_stripe_webhooks",
+            url=self.live_server_url + reverse("Payment:stripe-webhook"),
+            secret=SECRET,
+            session_id=payment.session_id,
+            count=3,
+            concurrency=2,
+            stdout=out,
+        )
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "PAID")
+        self.assertEqual(ProcessedStripeEvent.objects.count(), 2)
+        self.assertIn("200: 6", out.getvalue())
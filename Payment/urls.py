@@ -9,6 +9,7 @@ router.register("payments", views.PaymentViewSet, basename="payments")
 urlpatterns = [
     path("success/", views.PaymentSuccessView.as_view(), name="payment-success"),
     path("cancel/", views.PaymentCancelView.as_view(), name="payment-cancel"),
+    path("webhook/stripe/", views.StripeWebhookView.as_view(), name="stripe-webhook"),
 ] + router.urls
 
 app_name = "Payment"
@@ -1,25 +1,73 @@
+from datetime import timedelta
+
 import stripe
 from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from Borrowing.telegram_send import send_telegram_message
-from Payment.models import Payment
-from Payment.serializers import PaymentSerializer, PaymentDetailSerializer
-
+from Library.cache import BuildUnavailable, get_or_build
+from Library.conditional import ConditionalGetMixin
+from Library.export import ExportQuerySerializer, created_between, export_response
+from Library.pagination import PaymentCursorPagination
+from Library.query_budget import QueryBudgetMixin
+from Payment import stripe_client
+from Payment.models import Payment, PaymentDailyStat
+from Payment.serializers import (
+    PaymentDailyStatSerializer,
+    PaymentDetailSerializer,
+    PaymentSerializer,
+    PaymentStatsQuerySerializer,
+    PaymentStatsTotalSerializer,
+)
+from Payment.services import mark_payment_paid
+from Payment.webhooks import handle_event
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+PAYMENT_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name="type",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description="Filter by Type: PAYMENT or FINE",
+    ),
+    OpenApiParameter(
+        name="status",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description="Filter by Status: PENDING or PAID",
+    ),
+]
+EXPORT_COLUMNS = [
+    "id",
+    "created_at",
+    "type",
+    "status",
+    "money_to_pay",
+    "borrowing_id",
+    "borrowing__user__email",
+    "borrowing__book__title",
+    "session_id",
+]
 
 
-class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
+class PaymentViewSet(
+    QueryBudgetMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = Payment.objects.select_related(
         "borrowing__user", "borrowing__book"
     ).all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PaymentCursorPagination
+    # Export rows are fetched while the response streams, after dispatch.
+    query_budget = {"list": 3, "retrieve": 3, "stats": 3, "export": 1}
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -50,22 +98,7 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
     @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name="type",
-                type=OpenApiTypes.STR,
-                location=OpenApiParameter.QUERY,
-                required=False,
-                description="Filter by Type: PAYMENT or FINE",
-            ),
-            OpenApiParameter(
-                name="status",
-                type=OpenApiTypes.STR,
-                location=OpenApiParameter.QUERY,
-                required=False,
-                description="Filter by Status: PENDING or PAID",
-            ),
-        ],
+        parameters=PAYMENT_FILTER_PARAMETERS,
         responses={200: PaymentSerializer(many=True)},
         description="Take payments list. Users by theiself and Admins all. Can filter by Type and Status.",
     )
@@ -79,8 +112,67 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[ExportQuerySerializer, *PAYMENT_FILTER_PARAMETERS],
+        responses={(200, "text/csv"): OpenApiTypes.BINARY},
+        description="Stream payments as CSV or JSON Lines, optionally gzipped. "
+        "Only admins. Same filters as the list, plus a created_at date range.",
+    )
+    @action(detail=False, methods=["GET"])
+    def export(self, request):
+        params = ExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+
+        queryset = self.get_queryset().filter(**created_between(options)).order_by("pk")
+
+        return export_response(
+            queryset,
+            EXPORT_COLUMNS,
+            "payments",
+            export_format=options["export_format"],
+            gzip=options["gzip"],
+        )
+
+    @extend_schema(
+        parameters=[PaymentStatsQuerySerializer],
+        responses={200: PaymentDailyStatSerializer(many=True)},
+        description="Daily payment count and amount per type and status, plus totals "
+        "for the range. Only admins. Defaults to the last 30 days.",
+    )
+    @action(detail=False, methods=["GET"], pagination_class=None)
+    def stats(self, request):
+        params = PaymentStatsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+
+        date_to = filters.get("date_to", timezone.localdate())
+        date_from = filters.get("date_from", date_to - timedelta(days=30))
+        # Read from the rollup only, never from the payment table.
+        stats = PaymentDailyStat.objects.filter(day__range=(date_from, date_to))
+        for field in ("type", "status"):
+            if field in filters:
+                stats = stats.filter(**{field: filters[field]})
+
+        totals = (
+            stats.order_by("type", "status")
+            .values("type", "status")
+            .annotate(count=Sum("count"), amount=Sum("amount"))
+        )
+        return Response(
+            {
+                "date_from": date_from,
+                "date_to": date_to,
+                "results": PaymentDailyStatSerializer(stats, many=True).data,
+                "totals": PaymentStatsTotalSerializer(totals, many=True).data,
+            }
+        )
+
 
 class PaymentSuccessView(APIView):
+    # Usually confirms the payment, so read its status from the primary.
+    replica_reads = False
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -93,6 +185,9 @@ class PaymentSuccessView(APIView):
         responses={
             200: OpenApiResponse(description="Payment confirmed successfully"),
             400: OpenApiResponse(description="Invalid or unpaid session"),
+            503: OpenApiResponse(
+                description="Stripe is unavailable; the payment is confirmed later"
+            ),
         },
         description="Confirm Stripe payment success via session_id query parameter.",
     )
@@ -101,27 +196,69 @@ class PaymentSuccessView(APIView):
         if not session_id:
             return Response({"error": "session_id is required"}, status=400)
 
-        try:
-            session = stripe.checkout.Session.retrieve(session_id)
-        except stripe.error.InvalidRequestError:
-            return Response({"error": "Invalid session ID"}, status=400)
-
-        if session.payment_status == "paid":
-            payment = get_object_or_404(Payment, session_id=session_id)
-            if payment.status != "PAID":
-                payment.status = "PAID"
-                payment.save()
-
-                send_telegram_message(
-                    f"✅ Оплата прошла успешно\n"
-                    f"👤 {payment.borrowing.user.email}\n"
-                    f"📘 {payment.borrowing.book.title}\n"
-                    f"💰 ${payment.money_to_pay} ({payment.type})"
+        payment = get_object_or_404(Payment, session_id=session_id)
+
+        # The webhook normally marks the payment first; ask Stripe only if
+        # the user got here before it arrived. Double clicks and refreshes
+        # share one lookup, and only one of them flips the row.
+        if payment.status != Payment.Status.PAID:
+            try:
+                payment_status, _ = get_or_build(
+                    f"checkout-session-status:{session_id}",
+                    lambda: stripe_client.retrieve_checkout_session(
+                        session_id
+                    ).payment_status,
+                    timeout=settings.STRIPE_SESSION_CACHE_TTL,
+                    waiters_build=False,
                 )
+            except stripe.error.InvalidRequestError:
+                return Response({"error": "Invalid session ID"}, status=400)
+            except (BuildUnavailable, *stripe_client.OUTAGE_ERRORS):
+                # Includes CircuitOpenError, and callers whose shared lookup
+                # failed or is still slow. The webhook still marks the
+                # payment once Stripe delivers it.
+                return Response(
+                    {"message": "Payment is being confirmed, check back shortly."},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": "30"},
+                )
+
+            if payment_status != "paid":
+                return Response({"message": "Payment is not completed."}, status=400)
+
+            mark_payment_paid(session_id)
+
+        return Response({"message": "Payment completed successfully!"})
 
-            return Response({"message": "Payment completed successfully!"})
 
-        return Response({"message": "Payment is not completed."}, status=400)
+class StripeWebhookView(QueryBudgetMixin, APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    query_budget = 11
+
+    @extend_schema(
+        request=None,
+        responses={
+            200: OpenApiResponse(description="Event received"),
+            400: OpenApiResponse(description="Invalid payload or signature"),
+        },
+        description="Stripe webhook for Checkout Session events. Requests must be signed with STRIPE_WEBHOOK_SECRET.",
+    )
+    def post(self, request):
+        try:
+            event = stripe.Webhook.construct_event(
+                request.body,
+                request.headers.get("Stripe-Signature", ""),
+                settings.STRIPE_WEBHOOK_SECRET,
+            )
+        except (ValueError, stripe.error.SignatureVerificationError):
+            return Response(
+                {"error": "Invalid payload or signature"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        handle_event(event)
+        return Response({"received": True})
 
 
 class PaymentCancelView(APIView):
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+# Only what authentication and permission checks need; views that need the
+# full row (``MeView``) load it themselves.
+CACHED_FIELDS = ("id", "email", "is_staff", "is_superuser", "is_active")
+
+
+class LocalLRUCache:
+    """Small thread-safe in-process LRU cache whose entries expire after ``ttl``."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_users = LocalLRUCache(
+    settings.AUTH_USER_LOCAL_CACHE_SIZE, settings.AUTH_USER_LOCAL_CACHE_TTL
+)
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def invalidate_user(user_id):
+    local_users.delete(str(user_id))
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` without a user SELECT on every request.
+
+    The fields in ``CACHED_FIELDS`` are cached per process for
+    ``AUTH_USER_LOCAL_CACHE_TTL`` seconds and in the shared cache for
+    ``AUTH_USER_CACHE_TIMEOUT`` seconds. Saving or deleting a user drops both
+    entries in this process; other processes see the change once their
+    local entry expires.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            return super().get_user(validated_token)
+
+        fields = local_users.get(user_id)
+        if fields is None:
+            fields = cache.get(user_cache_key(user_id))
+            if fields is None:
+                user = super().get_user(validated_token)
+                fields = {name: getattr(user, name) for name in CACHED_FIELDS}
+                cache.set(
+                    user_cache_key(user_id),
+                    fields,
+                    timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+                )
+            local_users.set(user_id, fields)
+
+        if not fields["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        user = get_user_model()(**fields)
+        user._state.adding = False
+        user._state.db = "default"
+        return user
@@ -0,0 +1,69 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Library.query_budget import QueryCounter
+from User.authentication import CachedJWTAuthentication, invalidate_user
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second of an authenticated no-op endpoint with "
+        "the plain and the cached JWT authentication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    email="benchmark-auth@example.com", password="!"
+                )
+                token = str(AccessToken.for_user(user))
+                for authentication in (JWTAuthentication, CachedJWTAuthentication):
+                    self.report(authentication, token, options["requests"])
+                invalidate_user(user.pk)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def report(self, authentication, token, requests):
+        class Ping(APIView):
+            authentication_classes = [authentication]
+            permission_classes = [IsAuthenticated]
+
+            def get(self, request):
+                return Response()
+
+        view = Ping.as_view()
+        factory = APIRequestFactory()
+
+        # Warm up, which also fills the cache of the cached variant.
+        view(factory.get("/", HTTP_AUTHORIZE=f"Bearer {token}"))
+
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = view(factory.get("/", HTTP_AUTHORIZE=f"Bearer {token}"))
+                assert response.status_code == 200, response.status_code
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{authentication.__name__}: {requests / elapsed:.0f} requests/s, "
+            f"{queries.count / requests:.2f} queries/request"
+        )
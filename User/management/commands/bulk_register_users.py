@@ -0,0 +1,62 @@
+import csv
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from User.services import bulk_create_users, hash_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Register users from a CSV file with email and password columns (and "
+        "optionally first_name, last_name). Emails that are already registered "
+        "are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes (default: USER_BULK_HASH_WORKERS).",
+        )
+
+    def handle(self, *args, **options):
+        manager = get_user_model().objects
+        created = skipped = 0
+        started = time.perf_counter()
+
+        with open(options["path"], newline="") as file, hash_pool(
+            options["workers"]
+        ) as pool:
+            reader = csv.DictReader(file)
+            missing = {"email", "password"} - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+
+            while batch := list(islice(reader, options["batch_size"])):
+                rows = {}
+                for row in batch:
+                    email = manager.normalize_email(row["email"].strip())
+                    if email and row["password"] and email not in rows:
+                        rows[email] = {**row, "email": email}
+                existing = set(
+                    manager.filter(email__in=rows).values_list("email", flat=True)
+                )
+                new_rows = [row for email, row in rows.items() if email not in existing]
+
+                bulk_create_users(new_rows, pool=pool)
+                created += len(new_rows)
+                skipped += len(batch) - len(new_rows)
+                self.stdout.write(f"Created {created} user(s), skipped {skipped}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Registered {created} user(s) in {time.perf_counter() - started:.1f}s"
+                f", skipped {skipped} existing, duplicate or incomplete row(s)"
+            )
+        )
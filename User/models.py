@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.utils.translation import gettext as _
@@ -7,19 +8,26 @@ import User
 
 
 class CustomUserManager(UserManager):
-    def _create_user_object(self, email, password, **extra_fields) -> User:
-        email = self.normalize_email(email)
-        user = self.model(email=email, **extra_fields)
-        user.password = make_password(password)
+    def build_user(self, email, hashed_password, **extra_fields) -> User:
+        """An unsaved user whose password is already hashed."""
+        user = self.model(email=self.normalize_email(email), **extra_fields)
+        user.password = hashed_password
         return user
 
+    def _create_user_object(self, email, password, **extra_fields) -> User:
+        return self.build_user(email, make_password(password), **extra_fields)
+
     def _create_user(self, email, password, **extra_fields) -> User:
         user = self._create_user_object(email, password, **extra_fields)
         user.save(using=self._db)
         return user
 
     async def _acreate_user(self, email, password, **extra_fields) -> User:
-        user = self._create_user_object(email, password, **extra_fields)
+        # Hashing is CPU bound; keep it off the event loop.
+        hashed_password = await sync_to_async(make_password, thread_sensitive=False)(
+            password
+        )
+        user = self.build_user(email, hashed_password, **extra_fields)
         await user.asave(using=self._db)
         return user
 
@@ -1,8 +1,15 @@
+from collections import Counter
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from Library.timing import TimedSerializerMixin
+from User.services import hash_passwords, request_hash_pool
+from User.tasks import register_users
+
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ["id", "email", "password"]
@@ -43,3 +50,58 @@ class UserDetailSerializer(UserSerializer):
                 "min_length": 6,
             }
         }
+
+
+class BulkUserItemSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(
+        write_only=True, min_length=6, style={"input_type": "password"}
+    )
+    first_name = serializers.CharField(max_length=150, required=False)
+    last_name = serializers.CharField(max_length=150, required=False)
+
+
+class BulkUserSerializer(serializers.Serializer):
+    users = BulkUserItemSerializer(
+        many=True, allow_empty=False, max_length=settings.USER_BULK_MAX_USERS
+    )
+
+    def validate_users(self, users):
+        manager = get_user_model().objects
+        emails = [manager.normalize_email(user["email"]) for user in users]
+
+        duplicates = sorted(
+            email for email, count in Counter(emails).items() if count > 1
+        )
+        if duplicates:
+            raise serializers.ValidationError(
+                f"Duplicate emails: {', '.join(duplicates)}"
+            )
+
+        existing = sorted(
+            manager.filter(email__in=emails).values_list("email", flat=True)
+        )
+        if existing:
+            raise serializers.ValidationError(
+                f"Already registered: {', '.join(existing)}"
+            )
+        return [{**user, "email": email} for user, email in zip(users, emails)]
+
+    def create(self, validated_data):
+        """
+        Hash the passwords, then queue the users in chunks of
+        ``USER_BULK_TASK_SIZE`` for insertion; return the task ids.
+        """
+        users = validated_data["users"]
+        # Popped, so only the hashes go on to the broker.
+        passwords = [user.pop("password") for user in users]
+        hashed = hash_passwords(passwords, pool=request_hash_pool(), workers=1)
+        rows = [
+            {**user, "password_hash": password_hash}
+            for user, password_hash in zip(users, hashed)
+        ]
+        size = settings.USER_BULK_TASK_SIZE
+        return [
+            register_users.delay(rows[start : start + size]).id
+            for start in range(0, len(rows), size)
+        ]
@@ -0,0 +1,124 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+
+def _init_hash_worker():
+    # Spawned workers start without Django; forked ones already have it.
+    if not apps.ready:
+        django.setup()
+
+
+class HashPool(ProcessPoolExecutor):
+    """Process pool for ``make_password`` that knows how many workers it has."""
+
+    def __init__(self, workers, mp_context=None):
+        super().__init__(
+            max_workers=workers, initializer=_init_hash_worker, mp_context=mp_context
+        )
+        self.workers = workers
+
+
+def hash_pool(workers=None):
+    return HashPool(workers or settings.USER_BULK_HASH_WORKERS)
+
+
+_request_pool = None
+_request_pool_lock = threading.Lock()
+
+
+def request_hash_pool():
+    """
+    The web process's pool of ``USER_BULK_REQUEST_HASH_WORKERS`` processes,
+    or None when that is 1.
+
+    Started on first use and kept for the life of the process. Its workers
+    are spawned, as forking a web worker would copy its threads (such as the
+    database connection pool's) into them.
+    """
+    global _request_pool
+    if settings.USER_BULK_REQUEST_HASH_WORKERS <= 1:
+        return None
+    with _request_pool_lock:
+        if _request_pool is None:
+            _request_pool = HashPool(
+                settings.USER_BULK_REQUEST_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _request_pool
+
+
+def hash_passwords(passwords, pool=None, workers=None):
+    """
+    Hash ``passwords`` in a process pool, preserving order.
+
+    PBKDF2 is CPU bound, so hashing thousands of passwords in threads would
+    hold the GIL; separate processes use every core instead. Without a
+    ``pool`` one of ``workers`` (default ``USER_BULK_HASH_WORKERS``) processes
+    is started for the call, unless that is 1 or there is a single password.
+    """
+    passwords = list(passwords)
+    if pool is None:
+        workers = min(workers or settings.USER_BULK_HASH_WORKERS, len(passwords))
+        if workers <= 1:
+            return [make_password(password) for password in passwords]
+        with hash_pool(workers) as pool:
+            return hash_passwords(passwords, pool)
+
+    chunksize = max(len(passwords) // (pool.workers * 4), 1)
+    return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def insert_users(rows, batch_size=1000):
+    """
+    Insert users from ``rows`` of ``email``, ``password_hash`` and optional
+    names with ``bulk_create``, so no per-user ``save()`` or signal runs.
+
+    Emails already registered, also by a concurrent insert, are skipped.
+    Returns the number of users inserted.
+    """
+    User = get_user_model()
+    existing = set(
+        User.objects.filter(email__in=[row["email"] for row in rows]).values_list(
+            "email", flat=True
+        )
+    )
+    users = [
+        User.objects.build_user(
+            row["email"],
+            row["password_hash"],
+            first_name=row.get("first_name", ""),
+            last_name=row.get("last_name", ""),
+        )
+        for row in rows
+        if row["email"] not in existing
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+    return len(users)
+
+
+def bulk_create_users(rows, pool=None, batch_size=1000, workers=None):
+    """
+    Create users from ``rows`` of ``email``, ``password`` and optional names.
+
+    Passwords are hashed with ``hash_passwords`` and the users inserted with
+    ``insert_users``. Returns the number of users inserted.
+    """
+    hashed = hash_passwords(
+        (row["password"] for row in rows), pool=pool, workers=workers
+    )
+    return insert_users(
+        [
+            {**row, "password_hash": password_hash}
+            for row, password_hash in zip(rows, hashed)
+        ],
+        batch_size=batch_size,
+    )
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from User.authentication import invalidate_user
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_id = instance.pk
+    invalidate_user(user_id)
+    # Again after commit, in case a request cached the old row meanwhile.
+    transaction.on_commit(lambda: invalidate_user(user_id))
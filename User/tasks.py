@@ -0,0 +1,17 @@
+from celery import shared_task
+from django.db import OperationalError
+
+from User.services import insert_users
+
+
+@shared_task(autoretry_for=(OperationalError,), retry_backoff=True, max_retries=5)
+def register_users(rows):
+    """
+    Insert ``rows`` queued by the bulk registration endpoint.
+
+    The endpoint hashes the passwords, so rows carry ``password_hash`` and
+    no plain text password ever reaches the broker. Emails registered since
+    validation are skipped.
+    """
+    created = insert_users(rows)
+    return f"Registered {created} user(s), skipped {len(rows) - created}"
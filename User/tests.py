@@ -0,0 +1,233 @@
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from User.authentication import LocalLRUCache, local_users
+from User.services import hash_passwords
+from User.tasks import register_users
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.user = get_user_model().objects.create_user(
+            email="cached@test.com", password="pass", first_name="Ann"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZE=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.url = reverse("book-list")
+
+    def count_user_queries(self):
+        table = get_user_model()._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len([query for query in queries if f'"{table}"' in query["sql"]])
+
+    def test_user_is_looked_up_once(self):
+        self.assertEqual(self.count_user_queries(), 1)
+        self.assertEqual(self.count_user_queries(), 0)
+
+        # The shared cache still has it.
+        local_users.clear()
+        self.assertEqual(self.count_user_queries(), 0)
+
+        self.user.save()
+        self.assertEqual(self.count_user_queries(), 1)
+
+    def test_me_reads_full_user_and_invalidates(self):
+        self.count_user_queries()
+
+        response = self.client.get(reverse("User:me"))
+        self.assertEqual(response.data["first_name"], "Ann")
+
+        self.client.patch(reverse("User:me"), {"email": "new@test.com"})
+        self.count_user_queries()
+        self.assertEqual(
+            cache.get(f"auth-user:{self.user.pk}")["email"], "new@test.com"
+        )
+
+    def test_deactivated_user_is_rejected(self):
+        self.count_user_queries()
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse("User:me"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_flag_comes_from_cache(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.count_user_queries()
+
+        response = self.client.get(reverse("Payment:payments-stats"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class LocalLRUCacheTestCase(TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRUCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+
+    def test_entries_expire(self):
+        lru = LocalLRUCache(maxsize=2, ttl=0)
+        lru.set("a", 1)
+
+        self.assertIsNone(lru.get("a"))
+
+
+class AsyncCreateUserTestCase(TestCase):
+    async def test_password_is_hashed_off_the_event_loop(self):
+        threads = []
+
+        def recording_make_password(password):
+            threads.append(threading.current_thread())
+            return make_password(password)
+
+        with patch("User.models.make_password", recording_make_password):
+            user = await get_user_model().objects.acreate_user(
+                email="async@test.com", password="secret1"
+            )
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertTrue(user.check_password("secret1"))
+
+
+@override_settings(USER_BULK_HASH_WORKERS=2)
+class BulkRegistrationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("User:register-bulk")
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="pass"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    @override_settings(USER_BULK_TASK_SIZE=2, USER_BULK_REQUEST_HASH_WORKERS=2)
+    @patch("User.serializers.register_users.delay")
+    def test_queues_hashed_users_in_chunks(self, mock_delay):
+        mock_delay.side_effect = lambda rows: Mock(id=f"task-{len(rows)}")
+        users = [
+            {"email": f"pupil{index}@School.com", "password": f"secret{index}"}
+            for index in range(3)
+        ]
+
+        response = self.client.post(self.url, {"users": users}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {"queued": 3, "task_ids": ["task-2", "task-1"]})
+        queued = [row for call in mock_delay.call_args_list for row in call.args[0]]
+        self.assertEqual(queued[0]["email"], "pupil0@school.com")
+        for index, row in enumerate(queued):
+            self.assertNotIn("password", row)
+            self.assertTrue(check_password(f"secret{index}", row["password_hash"]))
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    def test_task_registers_users(self):
+        users = [
+            {
+                "email": f"pupil{index}@school.com",
+                "password_hash": make_password(f"secret{index}"),
+            }
+            for index in range(3)
+        ]
+        users[0]["first_name"] = "Ann"
+
+        report = register_users(
+            [*users, {"email": "admin@test.com", "password_hash": "x"}]
+        )
+
+        self.assertEqual(report, "Registered 3 user(s), skipped 1")
+        for index, user in enumerate(
+            get_user_model().objects.filter(email__startswith="pupil").order_by("id")
+        ):
+            self.assertTrue(user.check_password(f"secret{index}"))
+        self.assertEqual(
+            get_user_model().objects.get(email="pupil0@school.com").first_name, "Ann"
+        )
+
+    def test_chunks_follow_the_pool_size(self):
+        pool = Mock(workers=3)
+        pool.map.side_effect = lambda function, passwords, chunksize: passwords
+
+        hash_passwords(map(str, range(120)), pool=pool)
+
+        self.assertEqual(pool.map.call_args.kwargs["chunksize"], 10)
+
+    def test_rejects_known_and_duplicate_emails(self):
+        for users in (
+            [{"email": "admin@test.com", "password": "secret"}],
+            [{"email": "twin@test.com", "password": "secret"}] * 2,
+        ):
+            with patch("User.serializers.register_users.delay") as mock_delay:
+                response = self.client.post(self.url, {"users": users}, format="json")
+
+            mock_delay.assert_not_called()
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    def test_only_admins(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(email="user@test.com", password="x")
+        )
+
+        response = self.client.post(
+            self.url,
+            {"users": [{"email": "new@test.com", "password": "secret"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_skips_existing_duplicate_and_incomplete_rows(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write(
+                "email,password,first_name\n"
+                "a@school.com,secret,Ann\n"
+                "admin@test.com,secret,\n"
+                "b@school.com,secret,\n"
+                "a@school.com,other,\n"
+                "c@school.com,,\n"
+                "d@school.com,secret,\n"
+            )
+        self.addCleanup(os.remove, file.name)
+        out = StringIO()
+
+        call_command("bulk_register_users", file.name, batch_size=2, stdout=out)
+
+        self.assertIn("Registered 3 user(s)", out.getvalue())
+        self.assertIn("skipped 3", out.getvalue())
+        self.assertEqual(
+            set(
+                get_user_model()
+                .objects.filter(email__endswith="@school.com")
+                .values_list("email", flat=True)
+            ),
+            {"a@school.com", "b@school.com", "d@school.com"},
+        )
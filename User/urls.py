@@ -1,13 +1,13 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from User import views
 
 urlpatterns = [
     path("register/", views.CreateUserView.as_view(), name="register"),
+    path("register/bulk/", views.BulkCreateUserView.as_view(), name="register-bulk"),
     path("me/", views.MeView.as_view(), name="me"),
-    path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("token/", views.TokenView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 ]
 
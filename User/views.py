@@ -1,20 +1,60 @@
 from django.contrib.auth import get_user_model
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
 from rest_framework.generics import CreateAPIView, RetrieveUpdateAPIView
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
+from rest_framework.response import Response
+from rest_framework_simplejwt.views import TokenObtainPairView
 
 import User
-from User.serializers import UserSerializer, UserDetailSerializer
+from Library.query_budget import QueryBudgetMixin
+from Library.throttling import IPTokenBucketThrottle
+from User.serializers import BulkUserSerializer, UserSerializer, UserDetailSerializer
 
 
-class CreateUserView(CreateAPIView):
+class CreateUserView(QueryBudgetMixin, CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "register"
+    query_budget = 2
 
 
-class MeView(RetrieveUpdateAPIView):
+class TokenView(TokenObtainPairView):
+    # Every attempt runs a password hash.
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "token"
+
+
+class BulkCreateUserView(QueryBudgetMixin, CreateAPIView):
+    serializer_class = BulkUserSerializer
+    permission_classes = (IsAdminUser,)
+    # The email check; inserts run in Celery tasks.
+    query_budget = 1
+
+    @extend_schema(
+        responses={202: OpenApiTypes.OBJECT},
+        description="Register many users at once (only admins). The users are "
+        "validated and their passwords hashed, then inserted in bulk by Celery "
+        "tasks; answers with the number of queued users and the task ids.",
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task_ids = serializer.save()
+        return Response(
+            {"queued": len(serializer.validated_data["users"]), "task_ids": task_ids},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class MeView(QueryBudgetMixin, RetrieveUpdateAPIView):
     serializer_class = UserDetailSerializer
     queryset = get_user_model().objects.all()
     permission_classes = [IsAuthenticated]
+    query_budget = {"get": 2, "put": 3, "patch": 3}
 
     def get_object(self) -> User:
-        return self.request.user
+        # request.user only carries the cached authentication fields.
+        return self.get_queryset().get(pk=self.request.user.pk)